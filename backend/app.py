@@ -1,10 +1,22 @@
+import time
+_startup_began = time.perf_counter()
+
 from flask import Flask, request, jsonify, send_from_directory
 from flask_cors import CORS
-import joblib
+import atexit
+import hmac
 import os
-import pandas as pd
-import numpy as np
-from preprocess import preprocess_input
+import uuid
+# Thread limits have to be in place before numpy and xgboost are imported
+from threads import configure_threads, available_cpus, worker_count
+inference_threads = configure_threads()
+from preprocess import preprocess_input, preprocess_batch
+from audit import PredictionLog
+from batching import MicroBatcher
+from intervals import lookup_interval
+from locations import build_location_index, LocationSearchIndex
+from registry import ModelRegistry
+from schema import error_summary
 
 # Get the project root directory
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -13,50 +25,136 @@ frontend_path = os.path.join(project_root, 'frontend')
 app = Flask(__name__, static_folder=frontend_path)
 CORS(app, supports_credentials=True)
 
-# Load model and preprocessing objects
+# Model bundles live under model/versions/, model/CURRENT names the active one
 model_dir = os.path.join(project_root, 'model')
 print(f"Looking for model in: {model_dir}")
 
-# List files in model directory for debugging
-print("Files in model directory:", os.listdir(model_dir))
+# Results returned by /api/locations/search (default and cap)
+DEFAULT_SEARCH_RESULTS = 10
+MAX_SEARCH_RESULTS = 50
+
+# Location index for bundles built before locations.json was saved
+_csv_location_cache = None
+# (location index, search index built from it) for the active bundle
+_location_search = (None, None)
+
+def location_cache_for(bundle):
+    """Location dropdown data for a bundle, falling back to data.csv"""
+    global _csv_location_cache
+    if bundle.locations is not None:
+        return bundle.locations
+    if _csv_location_cache is None:
+        # Only bundles saved before locations.json need data.csv read at startup
+        import pandas as pd
+        dataset_path = os.path.join(project_root, 'data.csv')
+        _csv_location_cache = build_location_index(
+            pd.read_csv(dataset_path, usecols=['State', 'City', 'Locality'])
+        )
+    return _csv_location_cache
+
+def location_search_for(bundle):
+    """Locality search index for a bundle, rebuilt only when its locations change"""
+    global _location_search
+    locations = location_cache_for(bundle)
+    indexed, search_index = _location_search
+    if indexed is not locations:
+        search_index = LocationSearchIndex(locations)
+        _location_search = (locations, search_index)
+    return search_index
 
-# Load the model
-model_path = os.path.join(model_dir, 'model.pkl')
-print(f"Loading model from: {model_path}")
+# Synthetic request used to warm up a bundle before it takes traffic
+WARMUP_INPUT = {
+    'State': 'Madhya Pradesh', 'City': 'Bhopal', 'Locality': 'MP Nagar',
+    'Property_Type': 'Apartment', 'BHK': 2, 'Size_in_SqFt': 1000,
+    'Furnished_Status': 'Unfurnished', 'Floor_No': 1, 'Total_Floors': 5,
+    'Age_of_Property': 5, 'Nearby_Schools': 3, 'Nearby_Hospitals': 3,
+    'Public_Transport_Accessibility': 'High', 'Parking_Space': 'Yes',
+    'Security': 'Yes', 'Amenities': 2, 'Facing': 'North', 'Owner_Type': 'Owner',
+    'Availability_Status': 'Ready_To_Move'
+}
 
-if not os.path.exists(model_path):
-    raise FileNotFoundError(f"Model file not found at {model_path}")
+def warm_up(bundle):
+    """Run one prediction so lazy initialisation happens before the swap"""
+    bundle.model.predict(preprocess_input(dict(WARMUP_INPUT), bundle))
+    # Touch the memory-mapped comparables index so its first query isn't cold
+    if bundle.comparables is not None:
+        X = preprocess_input(dict(WARMUP_INPUT), bundle, target_encoded=True)
+        bundle.comparables.query(X[0], city=WARMUP_INPUT['City'], k=1)
+    # Build the locality search index now rather than on the first search
+    location_search_for(bundle)
 
 try:
-    model = joblib.load(model_path)
-    print("Successfully loaded the model")
+    registry = ModelRegistry(model_dir, warmup=warm_up, nthread=inference_threads)
+    print(f"Successfully loaded model version {registry.active.version}")
+    print(f"Inference threads per worker: {inference_threads} "
+          f"({available_cpus()} CPUs, {worker_count()} workers)")
 except Exception as e:
     print(f"Error loading model: {str(e)}")
     raise
 
-# Load dataset for location filtering
-dataset_path = os.path.join(project_root, 'data.csv')
-df = pd.read_csv(dataset_path)
+if registry.active.interval_table is None:
+    print("No interval table found, predictions will not include a price range")
 
-# Cache location relationships
-location_cache = {
-    'states': sorted(df['State'].unique().tolist()),
-    'state_cities': {},
-    'city_localities': {}
-}
+# Optional background watcher that hot-swaps when model/CURRENT changes
+watch_seconds = float(os.environ.get('REALESTIMATE_MODEL_WATCH_SECONDS', '0'))
+if watch_seconds > 0:
+    registry.watch(watch_seconds)
+
+def score_batch(items):
+    """Encode and score a micro-batch of (input_data, bundle) pairs"""
+    predictions = [None] * len(items)
+    # Requests pinned to different bundles (mid hot-swap) are scored separately
+    groups = {}
+    for i, (_, bundle) in enumerate(items):
+        groups.setdefault(id(bundle), (bundle, []))[1].append(i)
+    for bundle, indices in groups.values():
+        X = preprocess_batch([items[i][0] for i in indices], bundle)
+        for i, prediction in zip(indices, bundle.model.predict(X)):
+            predictions[i] = float(prediction)
+    return predictions
+
+# Opt-in micro-batching of concurrent /api/predict calls
+batch_max_size = int(os.environ.get('REALESTIMATE_BATCH_MAX_SIZE', '0'))
+batcher = None
+if batch_max_size > 1:
+    batch_max_wait_ms = float(os.environ.get('REALESTIMATE_BATCH_MAX_WAIT_MS', '2'))
+    batcher = MicroBatcher(score_batch, max_batch=batch_max_size, max_wait_ms=batch_max_wait_ms)
+    print(f"Micro-batching enabled: up to {batch_max_size} requests or {batch_max_wait_ms} ms")
 
-# Build state -> cities mapping
-for state in location_cache['states']:
-    cities = sorted(df[df['State'] == state]['City'].unique().tolist())
-    location_cache['state_cities'][state] = cities
+# Opt-in audit log of every /api/predict call (SQLite, written off the request path)
+audit_log_path = os.environ.get('REALESTIMATE_AUDIT_LOG')
+prediction_log = None
+if audit_log_path:
+    # Records carry the fields of the bundle that served them, so a hot-swap to
+    # a bundle with new features adds their columns
+    prediction_log = PredictionLog(
+        audit_log_path, registry.active.feature_order,
+        max_queue=int(os.environ.get('REALESTIMATE_AUDIT_QUEUE_SIZE', '10000'))
+    )
+    # Flush queued records when the worker shuts down
+    atexit.register(prediction_log.close)
+    print(f"Audit log enabled: {audit_log_path}")
 
-# Build city -> localities mapping
-for city in df['City'].unique():
-    localities = sorted(df[df['City'] == city]['Locality'].unique().tolist())
-    location_cache['city_localities'][city] = localities
+# Neighbours returned by /api/comparables (default and cap)
+DEFAULT_COMPARABLES = 5
+MAX_COMPARABLES = 50
+
+location_cache = location_cache_for(registry.active)
 
 print("Model loaded successfully")
-print(f"Location cache built: {len(location_cache['states'])} states")
+print(f"Location cache built: {len(location_cache['states'])} states, "
+      f"{len(location_search_for(registry.active))} searchable localities")
+
+print(f"Ready to serve in {time.perf_counter() - _startup_began:.2f}s")
+
+def invalid_request(errors):
+    """Structured 400 listing every invalid field"""
+    return jsonify({
+        'success': False,
+        'error': error_summary(errors),
+        'errors': errors,
+        'message': 'Please correct the highlighted fields'
+    }), 400
 
 @app.route('/')
 def index():
@@ -93,6 +191,18 @@ def serve_static(path):
 # Authentication is now handled by Firebase on the frontend
 # Flask login API routes are no longer needed
 
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness probe: the process is up and answering"""
+    return jsonify({'status': 'ok'})
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    """Readiness probe: reports the model version being served"""
+    # The model is loaded and warmed up while this module is imported, so the
+    # worker only answers once it can take traffic
+    return jsonify({'status': 'ready', 'model_version': registry.active.version})
+
 @app.route('/api/check-auth', methods=['GET'])
 def check_auth():
     """Check if user is logged in"""
@@ -117,6 +227,7 @@ def get_locations():
     """Get location data for dropdowns"""
     state = request.args.get('state')
     city = request.args.get('city')
+    location_cache = location_cache_for(registry.active)
     
     response = {
         'states': location_cache['states']
@@ -130,92 +241,85 @@ def get_locations():
     
     return jsonify(response)
 
+@app.route('/api/locations/search', methods=['GET'])
+def search_locations():
+    """Search-as-you-type over localities, returning ranked [State, City, Locality] triples"""
+    try:
+        limit = int(request.args.get('limit', DEFAULT_SEARCH_RESULTS))
+    except ValueError:
+        limit = DEFAULT_SEARCH_RESULTS
+    limit = max(1, min(limit, MAX_SEARCH_RESULTS))
+    fuzzy = request.args.get('fuzzy', '1').lower() not in ('0', 'false', 'no')
+    
+    results = location_search_for(registry.active).search(
+        request.args.get('q', ''), limit=limit,
+        state=request.args.get('state') or None, city=request.args.get('city') or None,
+        fuzzy=fuzzy
+    )
+    return jsonify({'results': results})
+
 @app.route('/api/predict', methods=['POST'])
 def predict():
     """Predict house price"""
+    started = time.perf_counter()
+    # Pin the bundle for this request so a hot-swap can't change it midway
+    bundle = registry.active
     try:
-        # Get input data
-        data = request.json
-        
-        # Ensure required fields are present
-        required_fields = [
-            'State', 'City', 'Locality', 'Property_Type', 'BHK', 'Size_in_SqFt',
-            'Furnished_Status', 'Total_Floors', 'Age_of_Property',
-            'Nearby_Schools', 'Nearby_Hospitals', 'Public_Transport_Accessibility',
-            'Parking_Space', 'Security', 'Amenities', 'Facing', 'Owner_Type',
-            'Availability_Status'
-        ]
-        
-        # Floor_No is only required for apartments
-        if data.get('Property_Type') not in ['Independent House', 'Villa']:
-            required_fields.append('Floor_No')
-        
-        missing_fields = [field for field in required_fields if field not in data]
-        if missing_fields:
-            return jsonify({
-                'success': False,
-                'error': f'Missing required fields: {missing_fields}',
-                'message': 'Please provide all required fields'
-            }), 400
-        
-        # Auto-set Floor_No to 0 for Independent House and Villa
-        if data.get('Property_Type') in ['Independent House', 'Villa']:
-            data['Floor_No'] = 0
+        # Validate and normalize the input before any encoding work
+        input_data, errors = bundle.schema.validate(request.get_json(silent=True))
+        if errors:
+            return invalid_request(errors)
+        if bundle.drift is not None:
+            bundle.drift.observe(input_data)
         
         # Prepare features for prediction
         try:
-            # Create a copy of the input data
-            input_data = data.copy()
-            
-            # Normalize text formatting
-            # Normalize Availability_Status
-            if 'Availability_Status' in input_data:
-                input_data['Availability_Status'] = str(input_data['Availability_Status']).strip()
-                if input_data['Availability_Status'] in ['Ready To Move', 'Ready to Move', 'ready to move']:
-                    input_data['Availability_Status'] = 'Ready_To_Move'
-            
-            # Normalize Furnished_Status
-            if 'Furnished_Status' in input_data:
-                input_data['Furnished_Status'] = str(input_data['Furnished_Status']).strip()
-                if input_data['Furnished_Status'] in ['Semi-Furnished', 'Semi-furnished', 'semi-furnished', 'semi furnished']:
-                    input_data['Furnished_Status'] = 'Semi_Furnished'
-            
-            # Normalize yes/no values to Yes/No
-            for col in ['Parking_Space', 'Security']:
-                if col in input_data:
-                    val = str(input_data[col]).strip().lower()
-                    input_data[col] = 'Yes' if val in ['yes', 'y'] else 'No'
-            
-            # Calculate Amenities_Count from Amenities string
-            amenities = input_data.get('Amenities', '')
-            if isinstance(amenities, str) and amenities.strip():
-                input_data['Amenities'] = len([a.strip() for a in amenities.split(',') if a.strip()])
+            # Encode and predict, batched with concurrent requests when enabled
+            if batcher is not None:
+                # Encoded and scored together with concurrent requests
+                prediction = batcher.submit((input_data, bundle))
             else:
-                input_data['Amenities'] = 0
-            
-            # Use preprocess_input function to handle encoding
-            X = preprocess_input(input_data)
+                X = preprocess_input(input_data, bundle)
+                
+                # Make prediction using the model
+                prediction = bundle.model.predict(X)[0]
             
-            # Make prediction using the model
-            prediction = model.predict(X)[0]
-            
-            return jsonify({
+            response = {
                 'success': True,
                 'prediction': float(prediction),
                 'message': 'Prediction successful',
                 'currency': 'INR',
-                'unit': 'lakhs'
-            })
+                'unit': 'lakhs',
+                'model_version': bundle.version
+            }
+            
+            # Price range comes from the calibration table, not a second model pass
+            if bundle.interval_table is not None:
+                response['prediction_interval'] = lookup_interval(
+                    bundle.interval_table, input_data.get('City'), input_data.get('Property_Type'), prediction
+                )
+            
+            if prediction_log is not None:
+                # The id lets the actual sale price be matched to this row later
+                response['request_id'] = uuid.uuid4().hex
+                prediction_log.log(response['request_id'], input_data, float(prediction), bundle.version,
+                                   (time.perf_counter() - started) * 1000, fields=bundle.feature_order)
+            
+            return jsonify(response)
             
         except Exception as e:
             print(f"Prediction error: {str(e)}")
             import traceback
             traceback.print_exc()
+            if prediction_log is not None:
+                prediction_log.log(uuid.uuid4().hex, input_data, None, bundle.version,
+                                   (time.perf_counter() - started) * 1000, error=type(e).__name__,
+                                   fields=bundle.feature_order)
+            # Details stay in the server log, the request isn't echoed back
             return jsonify({
                 'success': False,
-                'error': str(e),
-                'message': 'Error making prediction',
-                'input_data': input_data  # Include input data for debugging
+                'error': 'Internal error while making the prediction',
+                'message': 'Error making prediction'
             }), 500
         
     except Exception as e:
@@ -223,10 +327,101 @@ def predict():
         traceback.print_exc()
         return jsonify({
             'success': False,
-            'error': str(e),
+            'error': 'Internal server error',
             'message': 'Server error while processing prediction'
         }), 500
 
+@app.route('/api/comparables', methods=['POST'])
+def comparables():
+    """Most similar training listings to a property, with what they were priced at"""
+    bundle = registry.active
+    if bundle.comparables is None:
+        return jsonify({
+            'success': False,
+            'error': f'Model version {bundle.version} has no comparables index',
+            'message': 'Retrain the model to enable comparable listings'
+        }), 404
+    
+    data = request.get_json(silent=True)
+    input_data, errors = bundle.schema.validate(data)
+    if errors:
+        return invalid_request(errors)
+    
+    try:
+        k = int(data.get('k', DEFAULT_COMPARABLES))
+    except (TypeError, ValueError):
+        k = DEFAULT_COMPARABLES
+    k = max(1, min(k, MAX_COMPARABLES))
+    
+    # Target-encoded like the training rows, then searched within the listing's city
+    X = preprocess_input(input_data, bundle, target_encoded=True)
+    city = input_data.get('City')
+    return jsonify({
+        'success': True,
+        'comparables': bundle.comparables.query(X[0], city=city, k=k),
+        'city_matched': city in bundle.comparables.cities,
+        'unit': 'lakhs',
+        'model_version': bundle.version
+    })
+
+@app.route('/api/drift', methods=['GET'])
+def drift():
+    """How far live /api/predict inputs have drifted from the served model's training data"""
+    bundle = registry.active
+    if bundle.drift is None:
+        return jsonify({
+            'success': False,
+            'error': f'Model version {bundle.version} has no drift baseline',
+            'message': 'Retrain the model to enable drift monitoring'
+        }), 404
+    
+    # Counts are per worker process and restart with each model version
+    report = bundle.drift.report()
+    report.update({'success': True, 'model_version': bundle.version})
+    return jsonify(report)
+
+@app.route('/api/admin/reload', methods=['POST'])
+def admin_reload():
+    """Load a model bundle in the background of live traffic and swap it in"""
+    admin_token = os.environ.get('REALESTIMATE_ADMIN_TOKEN')
+    if not admin_token:
+        return jsonify({
+            'success': False,
+            'error': 'Admin endpoints are disabled (REALESTIMATE_ADMIN_TOKEN not set)'
+        }), 403
+    if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), admin_token):
+        return jsonify({'success': False, 'error': 'Invalid admin token'}), 401
+    
+    # Defaults to whatever model/CURRENT points at
+    body = request.get_json(silent=True)
+    if body is None:
+        body = {}
+    if not isinstance(body, dict):
+        return jsonify({'success': False, 'error': 'Request body must be a JSON object'}), 400
+    version = body.get('version')
+    previous = registry.active.version
+    if version is not None and not isinstance(version, str):
+        return jsonify({'success': False, 'error': 'version must be a string'}), 400
+    try:
+        bundle = registry.reload(version)
+    except LookupError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except Exception as e:
+        # Details (paths, checksums) stay in the server log
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': 'Could not load the model bundle',
+            'message': f'Reload failed, still serving version {previous}'
+        }), 500
+    
+    return jsonify({
+        'success': True,
+        'previous_version': previous,
+        'model_version': bundle.version
+    })
+
 if __name__ == '__main__':
     print("\n" + "="*50)
     print("Starting Flask Server...")
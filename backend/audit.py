@@ -0,0 +1,166 @@
+"""
+Audit log of served predictions
+
+Each /api/predict call is appended to a SQLite database in WAL mode: the
+normalized request fields, the prediction (or the error), the model version
+and the latency. A background thread does the inserts in batches. Request
+threads only put a row on a bounded queue; when the queue is full the row is
+dropped and counted rather than making the request wait.
+
+Each record stores the fields of the bundle that served it. When a hot-swap
+brings in a bundle with new features, their columns are added to the table
+the first time one of its records is written.
+
+The Price_in_Lakhs column is empty at prediction time. Rows whose actual
+price is filled in later (matched on request_id) are read back by
+`train.py --audit-log` as extra training rows.
+"""
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+TABLE = 'predictions'
+PRICE_COL = 'Price_in_Lakhs'
+
+# Columns written for every request, before the request fields
+LOG_COLUMNS = ['request_id', 'logged_at', 'model_version', 'latency_ms', 'prediction', 'error']
+
+# Rows inserted per transaction
+WRITE_BATCH = 256
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _connect(path):
+    connection = sqlite3.connect(path, timeout=5.0)
+    # WAL lets train.py and several workers read while one of them writes
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA synchronous=NORMAL')
+    return connection
+
+
+def _add_missing_columns(connection, columns):
+    existing = {row[1] for row in connection.execute(f"PRAGMA table_info({TABLE})")}
+    for col in columns:
+        if col not in existing:
+            connection.execute(f"ALTER TABLE {TABLE} ADD COLUMN {_quote(col)}")
+
+
+class PredictionLog:
+    """Non-blocking writer of prediction records to a SQLite audit log"""
+
+    def __init__(self, path, fields, max_queue=10000):
+        """
+        Args:
+            path: SQLite database file, created if missing
+            fields: Request fields to store when a record does not name its own
+            max_queue: Records waiting to be written before new ones are dropped
+        """
+        self.path = path
+        self.fields = tuple(fields)
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+
+        # {fields: INSERT statement}, filled in by the writer thread
+        self._inserts = {}
+
+        columns = LOG_COLUMNS + list(self.fields) + [PRICE_COL]
+        # Set the table up here so a bad path fails at startup, not in the writer
+        with closing(_connect(path)) as connection, connection:
+            connection.execute(f"CREATE TABLE IF NOT EXISTS {TABLE} "
+                               f"({', '.join(_quote(col) for col in columns)})")
+            # Bundles trained on new features add their columns to an older log
+            _add_missing_columns(connection, columns)
+            connection.execute(f"CREATE INDEX IF NOT EXISTS {TABLE}_request_id ON {TABLE} (request_id)")
+
+        self._worker = threading.Thread(target=self._run, name='prediction-log', daemon=True)
+        self._worker.start()
+
+    def log(self, request_id, input_data, prediction, model_version, latency_ms, error=None,
+            fields=None):
+        """
+        Queue one record; never blocks, drops the record when the queue is full
+
+        fields are the request fields of the bundle that served it (defaults to
+        the ones the log was created with)
+        """
+        fields = self.fields if fields is None else tuple(fields)
+        row = (request_id, time.time(), model_version, latency_ms, prediction, error,
+               *(input_data.get(col) for col in fields))
+        try:
+            self._queue.put_nowait((fields, row))
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout=5.0):
+        """Write out the queued records and stop the writer thread"""
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._worker.join(timeout)
+
+    def _insert_for(self, connection, fields):
+        """INSERT statement for records with these fields, adding any missing columns"""
+        insert = self._inserts.get(fields)
+        if insert is None:
+            _add_missing_columns(connection, fields)
+            written = LOG_COLUMNS + list(fields)
+            insert = (f"INSERT INTO {TABLE} ({', '.join(_quote(col) for col in written)}) "
+                      f"VALUES ({', '.join('?' * len(written))})")
+            self._inserts[fields] = insert
+        return insert
+
+    def _run(self):
+        connection = _connect(self.path)
+        while True:
+            # Block for one record, then take whatever else is already queued
+            batch = [self._queue.get()]
+            while len(batch) < WRITE_BATCH and batch[-1] is not None:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = batch[-1] is None
+            rows = [record for record in batch if record is not None]
+            # Records from different bundles (around a hot-swap) can carry different fields
+            by_fields = {}
+            for fields, row in rows:
+                by_fields.setdefault(fields, []).append(row)
+            try:
+                with connection:
+                    for fields, group in by_fields.items():
+                        connection.executemany(self._insert_for(connection, fields), group)
+            except sqlite3.Error as e:
+                # Columns added in the failed transaction were rolled back with it
+                self._inserts.clear()
+                self.dropped += len(rows)
+                print(f"Audit log write failed, dropped {len(rows)} records: {e}")
+            if stop:
+                connection.close()
+                return
+
+
+def read_logged_listings(path, fields):
+    """
+    Logged requests whose actual price has been recorded
+
+    Args:
+        path: SQLite audit log written by PredictionLog
+        fields: Request columns to return
+
+    Returns:
+        DataFrame with the fields and Price_in_Lakhs, one row per request
+    """
+    import pandas as pd
+    columns = ', '.join(_quote(col) for col in list(fields) + [PRICE_COL])
+    with closing(sqlite3.connect(path)) as connection:
+        return pd.read_sql_query(
+            f"SELECT {columns} FROM {TABLE} "
+            f"WHERE {_quote(PRICE_COL)} IS NOT NULL AND error IS NULL",
+            connection
+        )
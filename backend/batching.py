@@ -0,0 +1,80 @@
+"""
+Dynamic micro-batching for model scoring
+
+Concurrent callers submit single items; a worker thread collects them for
+up to `max_wait_ms` or until `max_batch` items are queued, scores them with
+one call, and hands each caller its own result. XGBoost evaluates a batch
+of rows with its multi-threaded tree traversal, so many 1-row predictions
+become one n-row prediction. When a batch fails, its items are retried one
+by one so only the callers whose item fails see the error.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """Queue single predictions and score them in batches"""
+
+    def __init__(self, score_batch, max_batch=32, max_wait_ms=2.0):
+        """
+        Args:
+            score_batch: Callable taking a list of items and returning a list
+                of results in the same order
+            max_batch: Largest number of items scored in one call
+            max_wait_ms: Longest time the first queued item waits for others
+        """
+        self.score_batch = score_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._worker.start()
+
+    def submit(self, item):
+        """Score one item, blocking until its batch has been scored"""
+        future = Future()
+        self._queue.put((item, future))
+        return future.result()
+
+    def _collect(self):
+        # Block for the first item, then gather more until the deadline or the size cap
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _score_alone(self, item, future):
+        try:
+            results = self.score_batch([item])
+            if len(results) != 1:
+                raise RuntimeError(f"score_batch returned {len(results)} results for 1 item")
+            future.set_result(results[0])
+        except Exception as e:
+            future.set_exception(e)
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            items = [item for item, _ in batch]
+            try:
+                results = self.score_batch(items)
+                if len(results) != len(batch):
+                    raise RuntimeError(f"score_batch returned {len(results)} results "
+                                       f"for {len(batch)} items")
+            except Exception:
+                # One bad item shouldn't fail its neighbours: retry each on its own,
+                # so only the failing callers get the exception
+                for item, future in batch:
+                    self._score_alone(item, future)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
@@ -0,0 +1,153 @@
+"""
+Nearest-neighbour index of training listings for comparable properties
+
+Rows are the encoded feature vectors train.py fits the model on, sorted by
+City so each city is one contiguous float32 block. A query scans only its
+city's block with a scaled Euclidean distance (exact brute force, which is
+faster than a tree at this dimensionality and block size). The arrays are
+saved as .npy files and memory-mapped at load time.
+"""
+import os
+import numpy as np
+
+ARRAY_FILES = {
+    'features': 'comparables_features.npy',
+    'prices': 'comparables_prices.npy',
+    'locality_codes': 'comparables_localities.npy',
+    'property_type_codes': 'comparables_property_types.npy'
+}
+
+
+class ComparablesIndex:
+    """City-partitioned exact k-nearest-neighbour search over training rows"""
+
+    def __init__(self, features, prices, locality_codes, property_type_codes,
+                 localities, property_types, cities, offsets, scale, feature_order):
+        self.features = features
+        self.prices = prices
+        self.locality_codes = locality_codes
+        self.property_type_codes = property_type_codes
+        self.localities = list(localities)
+        self.property_types = list(property_types)
+        self.cities = list(cities)
+        self.offsets = list(offsets)
+        self.scale = np.asarray(scale, dtype=np.float32)
+        self.feature_order = list(feature_order)
+        self._spans = {
+            city: (self.offsets[i], self.offsets[i + 1]) for i, city in enumerate(self.cities)
+        }
+        self._bhk_col = self.feature_order.index('BHK')
+        self._size_col = self.feature_order.index('Size_in_SqFt')
+
+    def __len__(self):
+        return len(self.prices)
+
+    @classmethod
+    def build(cls, X, prices, cities, localities, property_types, feature_order):
+        """
+        Build the index from the encoded training matrix
+
+        Args:
+            X: Encoded feature matrix (rows in feature_order columns)
+            prices: Price_in_Lakhs per row
+            cities, localities, property_types: Raw values per row
+            feature_order: Column names of X
+        """
+        cities = np.asarray(cities, dtype=str)
+        order = np.argsort(cities, kind='stable')
+        sorted_cities = cities[order]
+        city_names = np.unique(sorted_cities)
+        offsets = np.searchsorted(sorted_cities, city_names).tolist() + [len(order)]
+
+        localities_vocab, locality_codes = np.unique(np.asarray(localities, dtype=str)[order],
+                                                     return_inverse=True)
+        types_vocab, type_codes = np.unique(np.asarray(property_types, dtype=str)[order],
+                                            return_inverse=True)
+
+        features = np.ascontiguousarray(np.asarray(X, dtype=np.float32)[order])
+        # Distances in units of each feature's spread; constant features are ignored
+        std = features.std(axis=0)
+        scale = np.where(std > 0, 1.0 / np.where(std > 0, std, 1), 0).astype(np.float32)
+
+        return cls(features, np.asarray(prices, dtype=np.float32)[order],
+                   locality_codes.astype(np.int32), type_codes.astype(np.int16),
+                   localities_vocab.tolist(), types_vocab.tolist(), city_names.tolist(),
+                   offsets, scale, feature_order)
+
+    def extend(self, X, prices, cities, localities, property_types):
+        """New index holding these rows plus every row already indexed"""
+        old_cities = np.repeat(np.array(self.cities, dtype=str), np.diff(self.offsets))
+        return ComparablesIndex.build(
+            np.vstack([np.asarray(self.features), np.asarray(X, dtype=np.float32)]),
+            np.concatenate([np.asarray(self.prices), np.asarray(prices, dtype=np.float32)]),
+            np.concatenate([old_cities, np.asarray(cities, dtype=str)]),
+            np.concatenate([np.array(self.localities, dtype=str)[self.locality_codes],
+                            np.asarray(localities, dtype=str)]),
+            np.concatenate([np.array(self.property_types, dtype=str)[self.property_type_codes],
+                            np.asarray(property_types, dtype=str)]),
+            self.feature_order
+        )
+
+    def metadata(self):
+        return {
+            'localities': self.localities,
+            'property_types': self.property_types,
+            'cities': self.cities,
+            'offsets': self.offsets,
+            'scale': self.scale.tolist(),
+            'feature_order': self.feature_order
+        }
+
+    def save(self, bundle_dir):
+        """Write the array files into a bundle directory and return the metadata"""
+        for name, filename in ARRAY_FILES.items():
+            np.save(os.path.join(bundle_dir, filename), np.asarray(getattr(self, name)))
+        return self.metadata()
+
+    @classmethod
+    def load(cls, bundle_dir, meta, mmap_mode='r'):
+        """Memory-map the array files of a bundle"""
+        arrays = {
+            name: np.load(os.path.join(bundle_dir, filename), mmap_mode=mmap_mode)
+            for name, filename in ARRAY_FILES.items()
+        }
+        return cls(arrays['features'], arrays['prices'], arrays['locality_codes'],
+                   arrays['property_type_codes'], meta['localities'], meta['property_types'],
+                   meta['cities'], meta['offsets'], meta['scale'], meta['feature_order'])
+
+    def query(self, x, city=None, k=5):
+        """
+        Nearest training listings to one encoded feature row
+
+        Args:
+            x: Encoded feature row (same columns as the index)
+            city: Restrict the search to this city's block; unknown or
+                missing cities search every row
+            k: Number of neighbours
+
+        Returns:
+            List of dicts, closest first
+        """
+        start, end = self._spans.get(city, (0, len(self)))
+        block = self.features[start:end]
+        if len(block) == 0 or k <= 0:
+            return []
+
+        diff = (block - np.asarray(x, dtype=np.float32).reshape(-1)) * self.scale
+        distances = np.einsum('ij,ij->i', diff, diff)
+        k = min(k, len(distances))
+        nearest = np.argpartition(distances, k - 1)[:k]
+        nearest = nearest[np.argsort(distances[nearest])]
+
+        results = []
+        for i in nearest:
+            row = start + int(i)
+            results.append({
+                'locality': self.localities[self.locality_codes[row]],
+                'property_type': self.property_types[self.property_type_codes[row]],
+                'bhk': int(self.features[row, self._bhk_col]),
+                'size_in_sqft': float(self.features[row, self._size_col]),
+                'price_in_lakhs': float(self.prices[row]),
+                'distance': float(np.sqrt(distances[i]))
+            })
+        return results
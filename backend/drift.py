@@ -0,0 +1,238 @@
+"""
+Feature drift between the training data and live requests
+
+train.py saves a baseline sketch of every feature in metadata.json: decile
+bucket counts for numeric columns, and counts of the most frequent
+categories plus an 'other' bucket for categorical ones. The server counts
+incoming requests into the same fixed buckets, so memory does not grow with
+traffic, and /api/drift compares the two on demand:
+
+    psi     population stability index over the buckets
+            (>= 0.1 moderate, >= 0.25 significant drift)
+    ks      largest gap between the bucketed CDFs (numeric columns)
+
+together with the share of requests carrying a category the model never saw
+(it falls back to the training prior) or a number outside the training range.
+Training rows are sketched as the server would see them (Floor_No is 0 for
+property types without floors), and no feature gets a drift status before
+MIN_OBSERVATIONS requests have been counted.
+"""
+import bisect
+import threading
+import time
+import numpy as np
+
+# Imported as backend.drift by the root scripts, as drift by app.py
+try:
+    from .schema import NO_FLOOR_PROPERTY_TYPES
+except ImportError:
+    from schema import NO_FLOOR_PROPERTY_TYPES
+
+NUMERIC_BUCKETS = 10
+MAX_TRACKED_CATEGORIES = 50
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+# Share used for empty buckets so PSI stays finite
+MIN_SHARE = 1e-4
+# Requests needed before PSI is stable enough to report a status; with fewer,
+# sampling noise alone makes most features look drifted
+MIN_OBSERVATIONS = 300
+
+
+def _bucket_counts(edges, values):
+    return np.bincount(np.searchsorted(edges, values, side='right'), minlength=len(edges) + 1)
+
+
+def _served_values(X, col):
+    """A training column as normalize_request would hand it to the server"""
+    if col == 'Floor_No' and 'Property_Type' in X:
+        no_floor = np.isin(np.asarray(X['Property_Type'], dtype=str), NO_FLOOR_PROPERTY_TYPES)
+        return np.where(no_floor, 0, np.asarray(X[col], dtype=float))
+    return X[col]
+
+
+def _numeric_sketch(values):
+    values = np.asarray(values, dtype=float)
+    edges = np.unique(np.quantile(values, np.linspace(0, 1, NUMERIC_BUCKETS + 1)[1:-1]))
+    return {
+        'edges': edges.tolist(),
+        'counts': _bucket_counts(edges, values).tolist(),
+        'min': float(values.min()),
+        'max': float(values.max())
+    }
+
+
+def _categorical_sketch(values):
+    categories, counts = np.unique(np.asarray(values, dtype=str), return_counts=True)
+    top = np.argsort(-counts, kind='stable')[:MAX_TRACKED_CATEGORIES]
+    return {
+        'categories': categories[top].tolist(),
+        'counts': counts[top].tolist(),
+        'other': int(counts.sum() - counts[top].sum())
+    }
+
+
+def build_baseline(X, numerical_cols, categorical_cols):
+    """
+    Baseline sketches of the training features
+
+    Args:
+        X: Training features before encoding (DataFrame or {column: values})
+        numerical_cols, categorical_cols: Columns to sketch
+
+    Returns:
+        JSON-serialisable dict, stored as metadata.json 'drift_baseline'
+    """
+    return {
+        'numeric': {col: _numeric_sketch(_served_values(X, col)) for col in numerical_cols},
+        'categorical': {col: _categorical_sketch(X[col]) for col in categorical_cols}
+    }
+
+
+def extend_baseline(baseline, X):
+    """Baseline with the rows of X added to its counts (buckets and tracked categories unchanged)"""
+    numeric = {}
+    for col, sketch in baseline['numeric'].items():
+        values = np.asarray(_served_values(X, col), dtype=float)
+        numeric[col] = dict(
+            sketch,
+            counts=(np.asarray(sketch['counts']) + _bucket_counts(sketch['edges'], values)).tolist(),
+            min=min(sketch['min'], float(values.min())),
+            max=max(sketch['max'], float(values.max()))
+        )
+    categorical = {}
+    for col, sketch in baseline['categorical'].items():
+        tracked = {category: i for i, category in enumerate(sketch['categories'])}
+        counts, other = list(sketch['counts']), sketch['other']
+        for value in np.asarray(X[col], dtype=str):
+            i = tracked.get(value)
+            if i is None:
+                other += 1
+            else:
+                counts[i] += 1
+        categorical[col] = dict(sketch, counts=counts, other=other)
+    return {'numeric': numeric, 'categorical': categorical}
+
+
+def population_stability_index(expected, actual):
+    """PSI between two count vectors over the same buckets"""
+    expected = np.maximum(np.asarray(expected, dtype=float) / max(sum(expected), 1), MIN_SHARE)
+    actual = np.maximum(np.asarray(actual, dtype=float) / max(sum(actual), 1), MIN_SHARE)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def _ks(expected, actual):
+    expected = np.cumsum(expected) / max(sum(expected), 1)
+    actual = np.cumsum(actual) / max(sum(actual), 1)
+    return float(np.max(np.abs(actual - expected)))
+
+
+def _status(psi):
+    if psi >= PSI_SIGNIFICANT:
+        return 'significant'
+    return 'moderate' if psi >= PSI_MODERATE else 'stable'
+
+
+class DriftMonitor:
+    """Fixed-size counts of live request features, compared with a training baseline"""
+
+    def __init__(self, baseline, vocabularies=None):
+        """
+        Args:
+            baseline: Sketches from build_baseline
+            vocabularies: {column: every training category}, for the unseen-category
+                rate; columns without one count only the tracked categories as seen
+        """
+        vocabularies = vocabularies or {}
+        self.baseline = baseline
+        self.started = time.time()
+        self.observations = 0
+        self._lock = threading.Lock()
+        self._numeric = {
+            col: {'edges': sketch['edges'], 'low': sketch['min'], 'high': sketch['max'],
+                  'counts': [0] * len(sketch['counts']), 'out_of_range': 0}
+            for col, sketch in baseline['numeric'].items()
+        }
+        self._categorical = {
+            col: {'tracked': {category: i for i, category in enumerate(sketch['categories'])},
+                  'known': frozenset(str(c) for c in vocabularies.get(col, sketch['categories'])),
+                  'counts': [0] * len(sketch['categories']), 'other': 0, 'unseen': 0}
+            for col, sketch in baseline['categorical'].items()
+        }
+
+    @classmethod
+    def from_bundle(cls, bundle):
+        """Monitor for a loaded bundle, or None when it was saved without a baseline"""
+        if not bundle.drift_baseline:
+            return None
+        vocabularies = {
+            col: bundle.encoding.column_categories(col)
+            for col in bundle.categorical_cols if col in bundle.encoding.columns
+        }
+        return cls(bundle.drift_baseline, vocabularies)
+
+    def observe(self, input_data):
+        """Count one validated request"""
+        with self._lock:
+            self.observations += 1
+            for col, state in self._numeric.items():
+                value = input_data.get(col)
+                if value is None:
+                    continue
+                state['counts'][bisect.bisect_right(state['edges'], value)] += 1
+                if value < state['low'] or value > state['high']:
+                    state['out_of_range'] += 1
+            for col, state in self._categorical.items():
+                value = input_data.get(col)
+                i = state['tracked'].get(value)
+                if i is not None:
+                    state['counts'][i] += 1
+                    continue
+                state['other'] += 1
+                if value not in state['known']:
+                    state['unseen'] += 1
+
+    def report(self):
+        """
+        Drift of every feature since this monitor started
+
+        Returns:
+            Dict with 'observations', 'min_observations', 'since' (unix time),
+            'features' (per-column psi/ks/rates, None until a request has been
+            seen, and a status that stays 'insufficient_data' until
+            MIN_OBSERVATIONS requests) and 'drifted' (columns with significant PSI)
+        """
+        with self._lock:
+            n = self.observations
+            numeric = {col: (list(s['counts']), s['out_of_range']) for col, s in self._numeric.items()}
+            categorical = {col: (list(s['counts']) + [s['other']], s['unseen'])
+                           for col, s in self._categorical.items()}
+
+        features = {}
+        for col, (counts, out_of_range) in numeric.items():
+            expected = self.baseline['numeric'][col]['counts']
+            psi = population_stability_index(expected, counts) if n else None
+            features[col] = {
+                'type': 'numeric',
+                'psi': psi,
+                'ks': _ks(expected, counts) if n else None,
+                'out_of_range_rate': out_of_range / n if n else None
+            }
+        for col, (counts, unseen) in categorical.items():
+            sketch = self.baseline['categorical'][col]
+            psi = population_stability_index(sketch['counts'] + [sketch['other']], counts) if n else None
+            features[col] = {
+                'type': 'categorical',
+                'psi': psi,
+                'unseen_rate': unseen / n if n else None
+            }
+        for stats in features.values():
+            stats['status'] = _status(stats['psi']) if n >= MIN_OBSERVATIONS else 'insufficient_data'
+
+        return {
+            'observations': n,
+            'min_observations': MIN_OBSERVATIONS,
+            'since': self.started,
+            'features': features,
+            'drifted': [col for col, stats in features.items() if stats['status'] == 'significant']
+        }
@@ -0,0 +1,104 @@
+"""
+Target-encoding tables stored as flat NumPy arrays
+
+All categorical columns share four aligned arrays: `categories` (sorted
+within each column), the encoded `values`, and the per-category `counts`
+and target `sums` the values were computed from. `offsets` marks where
+each column's slice starts. The .npy files are memory-mapped at load time
+and looked up with a binary search, so nothing is unpickled.
+"""
+import os
+import numpy as np
+
+ARRAY_FILES = {
+    'categories': 'encoder_categories.npy',
+    'values': 'encoder_values.npy',
+    'counts': 'encoder_counts.npy',
+    'sums': 'encoder_sums.npy'
+}
+
+
+class EncodingTables:
+    """Read-only lookup from (column, category) to its target-encoded value"""
+
+    def __init__(self, columns, offsets, categories, values, prior,
+                 counts=None, sums=None, smoothing=0.3, min_samples_leaf=20):
+        self.columns = list(columns)
+        self.offsets = list(offsets)
+        self.categories = categories
+        self.values = values
+        self.counts = counts
+        self.sums = sums
+        self.prior = float(prior)
+        self.smoothing = smoothing
+        self.min_samples_leaf = min_samples_leaf
+        self._spans = {
+            col: (self.offsets[i], self.offsets[i + 1]) for i, col in enumerate(self.columns)
+        }
+
+    def encode(self, col, value):
+        """Encoded value for one category; unknown or missing values get the prior"""
+        if value is None or value == '' or (isinstance(value, float) and value != value):
+            return self.prior
+        start, end = self._spans[col]
+        value = str(value)
+        i = start + int(np.searchsorted(self.categories[start:end], value))
+        if i < end and self.categories[i] == value:
+            return float(self.values[i])
+        return self.prior
+
+    def column_categories(self, col):
+        """Known categories of a column (sorted)"""
+        start, end = self._spans[col]
+        return self.categories[start:end]
+
+    def metadata(self):
+        """JSON-serialisable part of the tables (stored in metadata.json)"""
+        return {
+            'columns': self.columns,
+            'offsets': self.offsets,
+            'prior': self.prior,
+            'smoothing': self.smoothing,
+            'min_samples_leaf': self.min_samples_leaf
+        }
+
+    def save(self, bundle_dir):
+        """Write the array files into a bundle directory and return the metadata"""
+        for name, filename in ARRAY_FILES.items():
+            array = getattr(self, name)
+            if array is not None:
+                np.save(os.path.join(bundle_dir, filename), np.asarray(array))
+        return self.metadata()
+
+    @classmethod
+    def load(cls, bundle_dir, meta, mmap_mode='r'):
+        """Memory-map the array files of a bundle"""
+        arrays = {}
+        for name, filename in ARRAY_FILES.items():
+            path = os.path.join(bundle_dir, filename)
+            arrays[name] = np.load(path, mmap_mode=mmap_mode) if os.path.exists(path) else None
+        return cls(meta['columns'], meta['offsets'], arrays['categories'], arrays['values'],
+                   meta['prior'], counts=arrays['counts'], sums=arrays['sums'],
+                   smoothing=meta.get('smoothing', 0.3),
+                   min_samples_leaf=meta.get('min_samples_leaf', 20))
+
+    @classmethod
+    def from_target_encoder(cls, encoder):
+        """Convert a fitted category_encoders.TargetEncoder (legacy pickles)"""
+        columns, offsets, categories, values = [], [0], [], []
+        for switch in encoder.ordinal_encoder.category_mapping:
+            col = switch['col']
+            ordinal = switch['mapping']
+            mapping = encoder.mapping[col]
+            pairs = sorted(
+                (str(category), float(mapping[code]))
+                for category, code in ordinal.items()
+                if code > 0 and code in mapping.index
+            )
+            columns.append(col)
+            categories.extend(c for c, _ in pairs)
+            values.extend(v for _, v in pairs)
+            offsets.append(len(categories))
+        return cls(columns, offsets, np.array(categories, dtype=str), np.array(values, dtype=float),
+                   encoder._mean, smoothing=encoder.smoothing,
+                   min_samples_leaf=encoder.min_samples_leaf)
@@ -0,0 +1,91 @@
+import math
+import numpy as np
+
+# Target coverage for the served price range (90% of true prices fall inside)
+DEFAULT_COVERAGE = 0.9
+
+# Groups with fewer calibration rows than this fall back to a coarser level
+MIN_GROUP_SIZE = 30
+
+
+def conformal_quantile(abs_residuals, coverage=DEFAULT_COVERAGE):
+    """
+    Split-conformal quantile of absolute residuals
+
+    Args:
+        abs_residuals: Absolute residuals |y - y_pred| on held-out rows
+        coverage: Desired coverage of the interval (e.g. 0.9)
+
+    Returns:
+        Half-width of the interval in lakhs
+    """
+    residuals = np.asarray(abs_residuals, dtype=float)
+    n = len(residuals)
+    if n == 0:
+        return 0.0
+    # Finite-sample correction: ceil((n + 1) * coverage) / n
+    level = min(1.0, math.ceil((n + 1) * coverage) / n)
+    return float(np.quantile(residuals, level, method='higher'))
+
+
+def build_interval_table(residuals, cities, property_types,
+                         coverage=DEFAULT_COVERAGE, min_group_size=MIN_GROUP_SIZE):
+    """
+    Build a conformal calibration table keyed on City and Property_Type
+
+    Args:
+        residuals: Signed residuals (y - y_pred) on a calibration split
+        cities: City value for each residual
+        property_types: Property_Type value for each residual
+        coverage: Desired coverage of the interval
+        min_group_size: Minimum rows for a group to get its own entry
+
+    Returns:
+        Dictionary with the global half-width, per-city half-widths and
+        per (city, property type) half-widths
+    """
+    abs_res = np.abs(np.asarray(residuals, dtype=float))
+    cities = np.asarray(cities, dtype=object)
+    property_types = np.asarray(property_types, dtype=object)
+
+    table = {
+        'coverage': coverage,
+        'global': conformal_quantile(abs_res, coverage),
+        'cities': {},
+        'groups': {}
+    }
+
+    for city in np.unique(cities):
+        city_mask = cities == city
+        if city_mask.sum() < min_group_size:
+            continue
+        table['cities'][city] = conformal_quantile(abs_res[city_mask], coverage)
+
+        table['groups'][city] = {}
+        for ptype in np.unique(property_types[city_mask]):
+            group_mask = city_mask & (property_types == ptype)
+            if group_mask.sum() >= min_group_size:
+                table['groups'][city][ptype] = conformal_quantile(abs_res[group_mask], coverage)
+
+    return table
+
+
+def lookup_interval(table, city, property_type, prediction):
+    """
+    Turn a point prediction into a price range using the calibration table
+
+    Falls back from (City, Property_Type) to City to the global width so
+    unseen locations still get a range. No extra model pass is needed.
+
+    Returns:
+        Dictionary with low, high and coverage
+    """
+    half_width = table['groups'].get(city, {}).get(property_type)
+    if half_width is None:
+        half_width = table['cities'].get(city, table['global'])
+
+    return {
+        'low': max(0.0, float(prediction) - half_width),
+        'high': float(prediction) + half_width,
+        'coverage': table['coverage']
+    }
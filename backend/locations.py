@@ -0,0 +1,182 @@
+import bisect
+import re
+
+# Fuzzy matches need at least this Dice similarity of character trigrams
+FUZZY_MIN_SIMILARITY = 0.4
+
+
+def build_location_index(df):
+    """
+    Build the State -> City -> Locality lookup used by the location dropdowns
+
+    Args:
+        df: DataFrame with State, City and Locality columns
+
+    Returns:
+        Dictionary with sorted 'states', 'state_cities' and 'city_localities'
+    """
+    pairs = df[['State', 'City']].drop_duplicates()
+    triples = df[['City', 'Locality']].drop_duplicates()
+
+    return {
+        'states': sorted(pairs['State'].unique().tolist()),
+        'state_cities': {
+            state: sorted(cities.tolist())
+            for state, cities in pairs.groupby('State')['City']
+        },
+        'city_localities': {
+            city: sorted(localities.tolist())
+            for city, localities in triples.groupby('City')['Locality']
+        }
+    }
+
+
+def merge_location_indexes(base, extra):
+    """Union of two location indexes, e.g. after new listings are added"""
+    state_cities = {s: set(c) for s, c in base['state_cities'].items()}
+    for state, cities in extra['state_cities'].items():
+        state_cities.setdefault(state, set()).update(cities)
+
+    city_localities = {c: set(l) for c, l in base['city_localities'].items()}
+    for city, localities in extra['city_localities'].items():
+        city_localities.setdefault(city, set()).update(localities)
+
+    return {
+        'states': sorted(state_cities),
+        'state_cities': {s: sorted(c) for s, c in state_cities.items()},
+        'city_localities': {c: sorted(l) for c, l in city_localities.items()}
+    }
+
+
+def _search_key(text):
+    """Lowercase words of a name with punctuation dropped ('M.P. Nagar' -> 'm p nagar')"""
+    return ' '.join(re.findall(r'[a-z0-9]+', str(text).lower()))
+
+
+def _trigrams(key):
+    """Character trigrams of each word, padded so word starts count twice"""
+    grams = set()
+    for word in key.split(' '):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _prefix_tiers(keys, ids):
+    """Sorted (keys, entry ids) lists for whole names and for names minus leading words"""
+    names = sorted((keys[i], i) for i in ids)
+    later_words = sorted(
+        (' '.join(words[w:]), i)
+        for i, words in ((i, keys[i].split(' ')) for i in ids)
+        for w in range(1, len(words))
+    )
+    return [([key for key, _ in pairs], [i for _, i in pairs]) for pairs in (names, later_words)]
+
+
+class LocationSearchIndex:
+    """
+    Search-as-you-type over every (State, City, Locality) triple
+
+    Prefix matches come from sorted key lists found with a binary search:
+    whole locality names, then the names minus their leading words ('nagar'
+    for MP Nagar), kept for all entries and per state and city so filtered
+    searches only walk their own keys. Fuzzy matches for misspellings come
+    from a trigram index over the distinct locality names, scored by Dice
+    similarity. Built once per location index.
+    """
+
+    def __init__(self, locations):
+        self.entries = sorted(
+            (state, city, locality)
+            for state, cities in locations['state_cities'].items()
+            for city in cities
+            for locality in locations['city_localities'].get(city, [])
+        )
+        self._keys = [_search_key(locality) for _, _, locality in self.entries]
+
+        by_state, by_city = {}, {}
+        for i, (state, city, _) in enumerate(self.entries):
+            by_state.setdefault(state, []).append(i)
+            by_city.setdefault(city, []).append(i)
+        self._tiers = _prefix_tiers(self._keys, range(len(self.entries)))
+        self._state_tiers = {state: _prefix_tiers(self._keys, ids) for state, ids in by_state.items()}
+        self._city_tiers = {city: _prefix_tiers(self._keys, ids) for city, ids in by_city.items()}
+
+        # Trigrams of each distinct name; the same locality recurs across cities
+        self._name_entries = {}
+        for i, key in enumerate(self._keys):
+            self._name_entries.setdefault(key, []).append(i)
+        self._gram_counts = {}
+        self._postings = {}
+        for name in self._name_entries:
+            grams = _trigrams(name)
+            self._gram_counts[name] = len(grams)
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(name)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def search(self, query, limit=10, state=None, city=None, fuzzy=True):
+        """
+        Localities matching a partial or misspelled name
+
+        Ranking: names starting with the query (an exact name first), then
+        names with a later word starting with it, each alphabetically, then
+        fuzzy matches by similarity.
+
+        Args:
+            query: Text typed so far
+            limit: Largest number of results
+            state, city: Only return localities in this state/city
+            fuzzy: Fill up with trigram matches when prefixes find too few
+
+        Returns:
+            List of (State, City, Locality) tuples, best first
+        """
+        key = _search_key(query)
+        if not key or limit <= 0:
+            return []
+
+        def allowed(i):
+            entry_state, entry_city, _ = self.entries[i]
+            return (state is None or entry_state == state) and (city is None or entry_city == city)
+
+        if city is not None:
+            tiers = self._city_tiers.get(city, [])
+        elif state is not None:
+            tiers = self._state_tiers.get(state, [])
+        else:
+            tiers = self._tiers
+
+        found = []
+        seen = set()
+        for keys, ids in tiers:
+            # Keys sharing the prefix are one contiguous run; stop once there are enough
+            position = bisect.bisect_left(keys, key)
+            while position < len(keys) and keys[position].startswith(key) and len(found) < limit:
+                i = ids[position]
+                if i not in seen and allowed(i):
+                    seen.add(i)
+                    found.append(i)
+                position += 1
+
+        if fuzzy and len(found) < limit and len(key) >= 3:
+            grams = _trigrams(key)
+            shared = {}
+            for gram in grams:
+                for name in self._postings.get(gram, ()):
+                    shared[name] = shared.get(name, 0) + 1
+            similar = sorted(
+                (-2 * count / (len(grams) + self._gram_counts[name]), name)
+                for name, count in shared.items()
+            )
+            for negative_similarity, name in similar:
+                if -negative_similarity < FUZZY_MIN_SIMILARITY or len(found) >= limit:
+                    break
+                for i in self._name_entries[name]:
+                    if len(found) < limit and i not in seen and allowed(i):
+                        seen.add(i)
+                        found.append(i)
+
+        return [self.entries[i] for i in found]
@@ -0,0 +1,341 @@
+"""
+Versioned model bundles and the in-process model registry
+
+A bundle is an immutable directory under model/versions/<version>/ holding
+every artifact one model needs plus a manifest.json with a SHA-256 checksum
+per file. model/CURRENT names the bundle the server should serve.
+
+Bundle layout (no pickles):
+    metadata.json            column lists, feature order, hyperparameters, encoder
+                             and interval metadata, category vocabularies of
+                             native-categorical models, baseline feature
+                             sketches for drift monitoring (see drift.py)
+    model.ubj                booster in native XGBoost UBJSON format
+    encoder_*.npy            target-encoding tables (see encoding.py), memory-mapped
+    locations.json           location dropdown index
+    comparables_*.npy        nearest-neighbour index of training rows (see
+                             comparables.py), memory-mapped, optional
+"""
+import hashlib
+import json
+import math
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from xgboost import XGBRegressor
+
+# Imported as backend.registry by the root scripts, as registry by app.py
+try:
+    from .comparables import ComparablesIndex
+    from .drift import DriftMonitor
+    from .encoding import EncodingTables
+    from .schema import RequestSchema
+except ImportError:
+    from comparables import ComparablesIndex
+    from drift import DriftMonitor
+    from encoding import EncodingTables
+    from schema import RequestSchema
+
+MANIFEST_FILE = 'manifest.json'
+METADATA_FILE = 'metadata.json'
+MODEL_FILE = 'model.ubj'
+LOCATIONS_FILE = 'locations.json'
+CURRENT_FILE = 'CURRENT'
+VERSIONS_DIR = 'versions'
+BUNDLE_FORMAT = 2
+
+# Artifacts every bundle must contain
+REQUIRED_FILES = [METADATA_FILE, MODEL_FILE, 'encoder_categories.npy', 'encoder_values.npy']
+
+# Per-file joblib pickles written by older versions of train.py
+LEGACY_FILES = [
+    'model.pkl', 'target_encoder.pkl', 'numerical_cols.pkl',
+    'categorical_cols.pkl', 'feature_order.pkl'
+]
+
+
+def new_version():
+    """Version name for a freshly built bundle"""
+    return datetime.now().strftime('%Y%m%d-%H%M%S')
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_manifest(bundle_dir, version, required=REQUIRED_FILES):
+    """Checksum every artifact in a bundle directory into manifest.json"""
+    files = {
+        name: file_sha256(os.path.join(bundle_dir, name))
+        for name in sorted(os.listdir(bundle_dir))
+        if name != MANIFEST_FILE and os.path.isfile(os.path.join(bundle_dir, name))
+    }
+    missing = [name for name in required if name not in files]
+    if missing:
+        raise FileNotFoundError(f"Bundle {bundle_dir} is missing {missing}")
+
+    manifest = {
+        'version': version,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'files': files
+    }
+    with open(os.path.join(bundle_dir, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def verify_manifest(bundle_dir):
+    """Check every artifact against manifest.json before anything is unpickled"""
+    with open(os.path.join(bundle_dir, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    for name, expected in manifest['files'].items():
+        actual = file_sha256(os.path.join(bundle_dir, name))
+        if actual != expected:
+            raise ValueError(f"Checksum mismatch for {name} in bundle {manifest['version']}")
+    return manifest
+
+
+def publish_bundle(model_dir, version):
+    """Point model/CURRENT at a bundle (atomic rename, readers never see a partial file)"""
+    verify_manifest(bundle_dir_for(model_dir, version))
+    tmp_path = os.path.join(model_dir, CURRENT_FILE + '.tmp')
+    with open(tmp_path, 'w') as f:
+        f.write(version + '\n')
+    os.replace(tmp_path, os.path.join(model_dir, CURRENT_FILE))
+
+
+def model_params(model):
+    """Constructor parameters of an XGBRegressor that survive a JSON round trip"""
+    params = {}
+    for key, value in model.get_params().items():
+        if isinstance(value, (bool, int, str)) or (isinstance(value, float) and math.isfinite(value)):
+            params[key] = value
+    return params
+
+
+def save_bundle(model_dir, model, encoding, metadata, locations=None, comparables=None,
+                version=None, publish=True):
+    """
+    Write a new immutable bundle and optionally make it current
+
+    Args:
+        model_dir: Registry root (the project's model/ directory)
+        model: Fitted XGBRegressor
+        encoding: EncodingTables for the categorical columns
+        metadata: JSON-serialisable dict with numerical_cols, categorical_cols,
+            feature_order and optionally interval_table
+        locations: Location index from locations.build_location_index
+        comparables: ComparablesIndex over the training rows
+        version: Version name, defaults to a timestamp
+        publish: Point model/CURRENT at the new bundle
+
+    Returns:
+        The version name
+    """
+    version = version or new_version()
+    final_dir = bundle_dir_for(model_dir, version)
+    if os.path.exists(final_dir):
+        raise FileExistsError(f"Bundle {version} already exists")
+
+    # Build in a temporary directory so a half-written bundle is never visible
+    tmp_dir = final_dir + '.tmp'
+    # Leftovers of a crashed run must not end up checksummed into this bundle
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    os.makedirs(tmp_dir)
+    model.save_model(os.path.join(tmp_dir, MODEL_FILE))
+    metadata = dict(metadata, format=BUNDLE_FORMAT, params=model_params(model),
+                    encoder=encoding.save(tmp_dir))
+    if comparables is not None:
+        metadata['comparables'] = comparables.save(tmp_dir)
+    with open(os.path.join(tmp_dir, METADATA_FILE), 'w') as f:
+        json.dump(metadata, f, indent=2)
+    if locations is not None:
+        with open(os.path.join(tmp_dir, LOCATIONS_FILE), 'w') as f:
+            json.dump(locations, f)
+    write_manifest(tmp_dir, version)
+    os.rename(tmp_dir, final_dir)
+
+    if publish:
+        publish_bundle(model_dir, version)
+    return version
+
+
+def current_version(model_dir):
+    """Version named by model/CURRENT, or None for a legacy flat model directory"""
+    path = os.path.join(model_dir, CURRENT_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return f.read().strip() or None
+
+
+def bundle_dir_for(model_dir, version):
+    """Directory holding a version's artifacts (legacy flat layout when version is None)"""
+    if version is None:
+        return model_dir
+    if os.path.basename(version) != version or version in ('.', '..'):
+        raise ValueError(f"Invalid model version: {version!r}")
+    return os.path.join(model_dir, VERSIONS_DIR, version)
+
+
+class ModelBundle:
+    """Every artifact for one model version, loaded together and never mutated"""
+
+    def __init__(self, bundle_dir, version=None):
+        manifest_path = os.path.join(bundle_dir, MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            self.version = verify_manifest(bundle_dir)['version']
+        else:
+            # Legacy flat model/ directory without a manifest
+            self.version = version or 'legacy'
+        self.path = bundle_dir
+
+        if os.path.exists(os.path.join(bundle_dir, METADATA_FILE)):
+            self._load(bundle_dir)
+        else:
+            self._load_legacy(bundle_dir)
+        # Compiled once per bundle, validates requests before any encoding work
+        self.schema = RequestSchema.from_bundle(self)
+        # Live feature counts against the training baseline, None for older bundles
+        self.drift = DriftMonitor.from_bundle(self)
+
+        locations_path = os.path.join(bundle_dir, LOCATIONS_FILE)
+        self.locations = None
+        if os.path.exists(locations_path):
+            with open(locations_path) as f:
+                self.locations = json.load(f)
+
+    def _load(self, bundle_dir):
+        with open(os.path.join(bundle_dir, METADATA_FILE)) as f:
+            metadata = json.load(f)
+        self.numerical_cols = metadata['numerical_cols']
+        self.categorical_cols = metadata['categorical_cols']
+        self.feature_order = metadata['feature_order']
+        self.interval_table = metadata.get('interval_table')
+        self.drift_baseline = metadata.get('drift_baseline')
+        self.encoding = EncodingTables.load(bundle_dir, metadata['encoder'])
+        # Native-categorical models take vocabulary positions instead of encoded values
+        self.categorical_encoding = metadata.get('categorical_encoding', 'target')
+        self.category_codes = None
+        if self.categorical_encoding == 'native':
+            self.category_codes = {
+                col: {category: code for code, category in enumerate(categories)}
+                for col, categories in metadata['vocabularies'].items()
+            }
+        self.comparables = None
+        if 'comparables' in metadata:
+            self.comparables = ComparablesIndex.load(bundle_dir, metadata['comparables'])
+        # Hyperparameters aren't all kept in the booster file, restore them for retraining
+        self.model = XGBRegressor(**metadata.get('params', {}))
+        self.model.load_model(os.path.join(bundle_dir, MODEL_FILE))
+
+    def _load_legacy(self, bundle_dir):
+        # Only trusted, locally produced pickles should ever reach this path
+        import joblib
+        for name in LEGACY_FILES:
+            if not os.path.exists(os.path.join(bundle_dir, name)):
+                raise FileNotFoundError(f"{name} not found in {bundle_dir}")
+        self.model = joblib.load(os.path.join(bundle_dir, 'model.pkl'))
+        self.encoding = EncodingTables.from_target_encoder(
+            joblib.load(os.path.join(bundle_dir, 'target_encoder.pkl'))
+        )
+        self.numerical_cols = joblib.load(os.path.join(bundle_dir, 'numerical_cols.pkl'))
+        self.categorical_cols = joblib.load(os.path.join(bundle_dir, 'categorical_cols.pkl'))
+        self.feature_order = joblib.load(os.path.join(bundle_dir, 'feature_order.pkl'))
+        interval_path = os.path.join(bundle_dir, 'interval_table.pkl')
+        self.interval_table = joblib.load(interval_path) if os.path.exists(interval_path) else None
+        self.drift_baseline = None
+        self.categorical_encoding = 'target'
+        self.category_codes = None
+        self.comparables = None
+
+    def set_threads(self, nthread):
+        """Threads XGBoost uses to score this bundle (overrides the n_jobs it was trained with)"""
+        self.model.set_params(n_jobs=nthread)
+        self.model.get_booster().set_param('nthread', nthread)
+
+
+def load_current_bundle(model_dir):
+    """Load whichever bundle model/CURRENT points at"""
+    version = current_version(model_dir)
+    return ModelBundle(bundle_dir_for(model_dir, version), version)
+
+
+class ModelRegistry:
+    """
+    Holds the active ModelBundle and swaps it atomically
+
+    Request handlers read `registry.active` once and use that bundle for the
+    whole request, so a swap never mixes artifacts from two versions and
+    in-flight requests finish on the version they started with.
+    """
+
+    def __init__(self, model_dir, warmup=None, nthread=None):
+        self.model_dir = model_dir
+        self.warmup = warmup
+        self.nthread = nthread
+        self._swap_lock = threading.Lock()
+        self._watcher = None
+        self.active = self._prepare(current_version(model_dir))
+
+    def _prepare(self, version):
+        try:
+            bundle_dir = bundle_dir_for(self.model_dir, version)
+        except ValueError:
+            bundle_dir = None
+        if bundle_dir is None or (version is not None and not os.path.isdir(bundle_dir)):
+            # Report the name only, the path stays on the server
+            raise LookupError(f"Unknown model version: {version!r}")
+        bundle = ModelBundle(bundle_dir, version)
+        if self.nthread is not None:
+            bundle.set_threads(self.nthread)
+        if self.warmup is not None:
+            self.warmup(bundle)
+        return bundle
+
+    def reload(self, version=None):
+        """
+        Load a bundle (CURRENT by default), warm it up, then swap it in
+
+        Loading happens before the swap, so a bad bundle raises here and the
+        active version keeps serving. Raises LookupError for a version
+        name that doesn't name a bundle.
+        """
+        with self._swap_lock:
+            if version is None:
+                version = current_version(self.model_dir)
+            if version is not None and version == self.active.version:
+                return self.active
+            bundle = self._prepare(version)
+            self.active = bundle
+            print(f"Model registry: now serving version {bundle.version}")
+            return bundle
+
+    def watch(self, interval):
+        """Poll model/CURRENT in a background thread and hot-swap on change"""
+        if self._watcher is not None:
+            return
+
+        def poll():
+            # Only react to changes of CURRENT, so an explicit admin reload
+            # of another version isn't reverted on the next poll
+            seen = current_version(self.model_dir)
+            while True:
+                time.sleep(interval)
+                try:
+                    version = current_version(self.model_dir)
+                    if version is not None and version != seen:
+                        self.reload(version)
+                        seen = version
+                except Exception as e:
+                    print(f"Model registry: reload failed, keeping {self.active.version}: {e}")
+
+        self._watcher = threading.Thread(target=poll, name='model-watcher', daemon=True)
+        self._watcher.start()
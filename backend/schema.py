@@ -0,0 +1,210 @@
+"""
+Request validation compiled from a model bundle
+
+The schema is built once per bundle from its column lists and the category
+vocabularies of the encoding tables. Each field gets a precompiled check.
+Numbers only have to be plausible (SANITY_BOUNDS): values outside what the
+model was trained on are still scored, and /api/drift reports them.
+Normalization never turns a malformed value into a valid one. A request is
+rejected with every problem listed before any encoding or model work starts.
+Valid values come back in the form the model was trained on: numbers as
+floats, categories in their training spelling.
+"""
+import math
+
+# Location columns accept values outside the training vocabulary (they get the
+# training prior); every other categorical column must use a known category
+OPEN_VOCABULARY_COLS = ('State', 'City', 'Locality')
+
+# Property types without floors: Floor_No is optional and set to 0
+NO_FLOOR_PROPERTY_TYPES = ('Independent House', 'Villa')
+
+# Yes/no fields and the spellings they accept (any case)
+YES_NO_COLS = ('Parking_Space', 'Security')
+YES_NO_VALUES = {'yes': 'Yes', 'y': 'Yes', 'no': 'No', 'n': 'No'}
+
+# Unknown-category errors list the allowed values up to this many
+MAX_LISTED_CATEGORIES = 10
+
+# Plausibility limits for numeric fields, (min, max) with None for no limit.
+# Columns not listed only have to be non-negative.
+SANITY_BOUNDS = {
+    'BHK': (0, 50),
+    'Size_in_SqFt': (1, 1000000),
+    'Floor_No': (0, 200),
+    'Total_Floors': (0, 200),
+    'Age_of_Property': (0, 500),
+    'Nearby_Schools': (0, 1000),
+    'Nearby_Hospitals': (0, 1000),
+    'Amenities': (0, 100),
+}
+DEFAULT_BOUNDS = (0, None)
+
+
+def _canonical(value):
+    """Spelling-insensitive form of a category ('Ready To Move' == 'Ready_to_Move')"""
+    return value.lower().replace(' ', '_').replace('-', '_')
+
+
+_NO_FLOOR_SPELLINGS = frozenset(_canonical(t) for t in NO_FLOOR_PROPERTY_TYPES)
+
+
+def _has_no_floors(property_type):
+    """Whether a Property_Type, in any accepted spelling, is one without floors"""
+    return isinstance(property_type, str) and _canonical(property_type.strip()) in _NO_FLOOR_SPELLINGS
+
+
+def normalize_request(data):
+    """Copy of a request payload with text normalized as in training"""
+    # Copy with surrounding whitespace trimmed, as train.py does for text columns
+    input_data = {key: value.strip() if isinstance(value, str) else value
+                  for key, value in data.items()}
+
+    # Auto-set Floor_No to 0 for Independent House and Villa
+    if _has_no_floors(input_data.get('Property_Type')):
+        input_data['Floor_No'] = 0
+
+    # Normalize Availability_Status
+    if 'Availability_Status' in input_data:
+        input_data['Availability_Status'] = str(input_data['Availability_Status']).strip()
+        if input_data['Availability_Status'] in ['Ready To Move', 'Ready to Move', 'ready to move']:
+            input_data['Availability_Status'] = 'Ready_To_Move'
+
+    # Normalize Furnished_Status
+    if 'Furnished_Status' in input_data:
+        input_data['Furnished_Status'] = str(input_data['Furnished_Status']).strip()
+        if input_data['Furnished_Status'] in ['Semi-Furnished', 'Semi-furnished', 'semi-furnished', 'semi furnished']:
+            input_data['Furnished_Status'] = 'Semi_Furnished'
+
+    # Normalize yes/no values to Yes/No; anything else is left for validation to reject
+    for col in YES_NO_COLS:
+        value = input_data.get(col)
+        if isinstance(value, str) and value.lower() in YES_NO_VALUES:
+            input_data[col] = YES_NO_VALUES[value.lower()]
+
+    # Amenities arrive as a comma-separated string (or already as a count,
+    # which the numeric check validates)
+    amenities = input_data.get('Amenities')
+    if isinstance(amenities, str):
+        input_data['Amenities'] = len([a.strip() for a in amenities.split(',') if a.strip()])
+
+    return input_data
+
+
+def _numeric_check(col, low, high):
+    def check(value):
+        if isinstance(value, bool):
+            return value, ('invalid_type', f"{col} must be a number")
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return value, ('invalid_type', f"{col} must be a number")
+        if not math.isfinite(number):
+            return value, ('invalid_type', f"{col} must be a finite number")
+        if low is not None and number < low:
+            return value, ('out_of_range', f"{col} must be at least {low:g}")
+        if high is not None and number > high:
+            return value, ('out_of_range', f"{col} must be at most {high:g}")
+        return number, None
+    return check
+
+
+def _yes_no_check(col):
+    def check(value):
+        if value not in ('Yes', 'No'):
+            return value, ('invalid_type', f"{col} must be yes or no")
+        return value, None
+    return check
+
+
+def _categorical_check(col, vocabulary):
+    spellings = None
+    if vocabulary is not None:
+        spellings = {_canonical(category): category for category in vocabulary}
+    if vocabulary is not None and len(vocabulary) <= MAX_LISTED_CATEGORIES:
+        unknown_message = f"{col} must be one of: {', '.join(sorted(vocabulary))}"
+    else:
+        unknown_message = f"{col} is not a known value"
+
+    def check(value):
+        if not isinstance(value, str) or not value.strip():
+            return value, ('invalid_type', f"{col} must be a non-empty string")
+        if spellings is not None and value not in vocabulary:
+            # Accept other spellings of a known category, rewritten to the training one
+            known = spellings.get(_canonical(value))
+            if known is None:
+                return value, ('unknown_category', unknown_message)
+            return known, None
+        return value, None
+    return check
+
+
+class RequestSchema:
+    """Validator for prediction requests against one model bundle"""
+
+    def __init__(self, feature_order, numerical_cols, vocabularies=None, bounds=None):
+        """
+        Args:
+            feature_order: Every request field, in model order
+            numerical_cols: Fields that must be numbers
+            vocabularies: {column: known categories}; columns without one accept any string
+            bounds: {column: (min, max)} plausibility limits, defaults to SANITY_BOUNDS
+        """
+        vocabularies = vocabularies or {}
+        bounds = SANITY_BOUNDS if bounds is None else bounds
+        self.fields = list(feature_order)
+        self._checks = []
+        for col in self.fields:
+            if col in numerical_cols:
+                low, high = bounds.get(col, DEFAULT_BOUNDS)
+                self._checks.append((col, _numeric_check(col, low, high)))
+            elif col in YES_NO_COLS:
+                self._checks.append((col, _yes_no_check(col)))
+            else:
+                vocabulary = None
+                if col not in OPEN_VOCABULARY_COLS and col in vocabularies:
+                    vocabulary = frozenset(str(c) for c in vocabularies[col])
+                self._checks.append((col, _categorical_check(col, vocabulary)))
+
+    @classmethod
+    def from_bundle(cls, bundle):
+        """Schema from a loaded bundle's column lists and encoding tables"""
+        vocabularies = {
+            col: bundle.encoding.column_categories(col)
+            for col in bundle.categorical_cols if col in bundle.encoding.columns
+        }
+        return cls(bundle.feature_order, bundle.numerical_cols, vocabularies)
+
+    def validate(self, data):
+        """
+        Check a raw request and normalize it
+
+        Args:
+            data: Request payload as sent by the client
+
+        Returns:
+            (normalized input, errors) where errors is a list of
+            {'field', 'code', 'message'} dicts, empty when the input is valid
+        """
+        if not isinstance(data, dict):
+            return None, [{'field': None, 'code': 'invalid_body',
+                           'message': 'Request body must be a JSON object'}]
+
+        errors = []
+        optional = ('Floor_No',) if _has_no_floors(data.get('Property_Type')) else ()
+        missing = {col for col in self.fields if data.get(col) is None and col not in optional}
+
+        input_data = normalize_request(data)
+        for col, check in self._checks:
+            if col in missing:
+                errors.append({'field': col, 'code': 'missing', 'message': f"{col} is required"})
+                continue
+            input_data[col], problem = check(input_data.get(col))
+            if problem is not None:
+                errors.append({'field': col, 'code': problem[0], 'message': problem[1]})
+        return (None, errors) if errors else (input_data, [])
+
+
+def error_summary(errors):
+    """One readable line for clients that only show a single message"""
+    return '; '.join(error['message'] for error in errors)
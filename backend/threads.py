@@ -0,0 +1,60 @@
+"""
+Inference thread limits for multi-worker serving
+
+XGBoost (OpenMP) and the BLAS libraries default to one thread per core. With
+several gunicorn workers on one machine every worker does that, and the
+oversubscribed threads end up fighting over the same cores. Each worker gets
+its share of the CPUs instead:
+
+    REALESTIMATE_INFERENCE_THREADS   explicit threads per worker
+    REALESTIMATE_WORKERS             worker count (falls back to WEB_CONCURRENCY)
+
+This module must not import numpy or xgboost: configure_threads() has to run
+before they load their thread pools.
+"""
+import os
+
+# Read by OpenMP and the BLAS backends when they first load
+THREAD_ENV_VARS = [
+    'OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+    'VECLIB_MAXIMUM_THREADS', 'NUMEXPR_NUM_THREADS'
+]
+
+
+def available_cpus():
+    """CPUs this process may run on (respects taskset/cgroup CPU sets)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def worker_count():
+    """Serving processes sharing this machine's CPUs"""
+    value = os.environ.get('REALESTIMATE_WORKERS') or os.environ.get('WEB_CONCURRENCY') or '1'
+    return max(1, int(value))
+
+
+def inference_threads(workers=None, cpus=None):
+    """Threads one worker should use for inference"""
+    explicit = os.environ.get('REALESTIMATE_INFERENCE_THREADS')
+    if explicit:
+        return max(1, int(explicit))
+    workers = workers or worker_count()
+    cpus = cpus or available_cpus()
+    return max(1, cpus // workers)
+
+
+def configure_threads():
+    """
+    Limit OpenMP/BLAS threads for this process before numpy or xgboost load
+
+    Thread variables that are already set are left alone.
+
+    Returns:
+        Threads per worker, to pass on as XGBoost's nthread
+    """
+    threads = inference_threads()
+    for var in THREAD_ENV_VARS:
+        os.environ.setdefault(var, str(threads))
+    return threads
@@ -0,0 +1,580 @@
+"""
+Serving performance benchmarks
+
+Usage:
+    python benchmark.py intervals
+    python benchmark.py serialization [--legacy-dir model]
+    python benchmark.py batching [--clients 32 --duration 3]
+    python benchmark.py comparables
+    python benchmark.py locations
+    python benchmark.py audit
+    python benchmark.py drift
+    python benchmark.py startup [--output importtime.txt]
+    python benchmark.py threads [--duration 3]
+    python benchmark.py categorical [--rows 50000 --trees 300]
+"""
+import argparse
+import itertools
+import multiprocessing
+import os
+import json
+import resource
+import subprocess
+import sys
+import threading
+import time
+import numpy as np
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+sys.path.insert(0, BACKEND_DIR)
+
+from preprocess import preprocess_input, preprocess_batch
+from audit import PredictionLog
+from batching import MicroBatcher
+from comparables import ComparablesIndex
+from drift import DriftMonitor, MIN_OBSERVATIONS
+from intervals import lookup_interval
+from locations import LocationSearchIndex
+from threads import THREAD_ENV_VARS, available_cpus, inference_threads
+from registry import (ModelBundle, LEGACY_FILES, METADATA_FILE, load_current_bundle,
+                      current_version, bundle_dir_for)
+
+# Normalized request payload (as produced by /api/predict before encoding)
+SAMPLE_INPUT = {
+    'State': 'Madhya Pradesh',
+    'City': 'Bhopal',
+    'Locality': 'MP Nagar',
+    'Property_Type': 'Independent House',
+    'BHK': 1,
+    'Size_in_SqFt': 624,
+    'Furnished_Status': 'Unfurnished',
+    'Floor_No': 0,
+    'Total_Floors': 1,
+    'Age_of_Property': 2,
+    'Nearby_Schools': 0,
+    'Nearby_Hospitals': 5,
+    'Public_Transport_Accessibility': 'High',
+    'Parking_Space': 'Yes',
+    'Security': 'Yes',
+    'Amenities': 4,
+    'Facing': 'West',
+    'Owner_Type': 'Owner',
+    'Availability_Status': 'Ready_To_Move'
+}
+
+
+def time_calls(fn, repeats):
+    """Run fn repeatedly and return per-call latencies in milliseconds"""
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def print_latency(label, latencies):
+    print(f"  {label:<32} p50: {np.percentile(latencies, 50):8.3f} ms   "
+          f"p95: {np.percentile(latencies, 95):8.3f} ms")
+
+
+def bench_intervals(args):
+    """Overhead of returning a price range on top of the point prediction"""
+    bundle = load_current_bundle('model')
+    model, interval_table = bundle.model, bundle.interval_table
+
+    def point_only():
+        X = preprocess_input(dict(SAMPLE_INPUT), bundle)
+        return model.predict(X)[0]
+
+    def with_interval():
+        prediction = point_only()
+        return lookup_interval(interval_table, SAMPLE_INPUT['City'],
+                               SAMPLE_INPUT['Property_Type'], prediction)
+
+    # Warm up lazy initialisation before timing
+    with_interval()
+
+    point_latencies = time_calls(point_only, args.repeats)
+    interval_latencies = time_calls(with_interval, args.repeats)
+    lookup_latencies = time_calls(
+        lambda: lookup_interval(interval_table, SAMPLE_INPUT['City'],
+                                SAMPLE_INPUT['Property_Type'], 100.0),
+        args.repeats
+    )
+
+    print_latency("point prediction", point_latencies)
+    print_latency("point prediction + interval", interval_latencies)
+    print_latency("interval lookup only", lookup_latencies)
+    overhead = np.median(lookup_latencies) / np.median(point_latencies)
+    print(f"\n  Interval overhead: {overhead:.2%} of a prediction pass")
+
+
+def _load_in_child(kind, path, queue):
+    """Load artifacts in a fresh process and report time and peak RSS growth"""
+    import joblib
+    import xgboost  # noqa: F401 - import cost is excluded from the measurement
+    before_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if kind == 'pickles':
+        artifacts = [joblib.load(os.path.join(path, name)) for name in LEGACY_FILES]
+    else:
+        artifacts = ModelBundle(path)
+    seconds = time.perf_counter() - start
+    after_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((seconds, (after_kb - before_kb) / 1024))
+
+
+def _measure_load(kind, path, repeats):
+    ctx = multiprocessing.get_context('spawn')
+    results = []
+    for _ in range(repeats):
+        queue = ctx.Queue()
+        process = ctx.Process(target=_load_in_child, args=(kind, path, queue))
+        process.start()
+        results.append(queue.get())
+        process.join()
+    seconds, rss_mb = zip(*results)
+    return np.median(seconds) * 1000, np.median(rss_mb)
+
+
+def _dir_size_mb(path, names):
+    return sum(os.path.getsize(os.path.join(path, n)) for n in names) / (1024 * 1024)
+
+
+def bench_serialization(args):
+    """Cold load time and memory of per-file pickles vs the array/JSON bundle"""
+    bundle_dir = bundle_dir_for('model', current_version('model'))
+    rows = []
+
+    legacy_dir = args.legacy_dir
+    if all(os.path.exists(os.path.join(legacy_dir, name)) for name in LEGACY_FILES):
+        ms, rss = _measure_load('pickles', legacy_dir, args.processes)
+        rows.append(("per-file pickles", ms, rss, _dir_size_mb(legacy_dir, LEGACY_FILES)))
+
+        # The old preprocess_input unpickled the encoder and column lists per request
+        import joblib
+        per_request = time_calls(lambda: [
+            joblib.load(os.path.join(legacy_dir, name))
+            for name in ('target_encoder.pkl', 'numerical_cols.pkl', 'categorical_cols.pkl')
+        ], 20)
+        print_latency("old per-request unpickling", per_request)
+    else:
+        print(f"  No legacy pickles in {legacy_dir}, skipping the pickle baseline")
+
+    if os.path.exists(os.path.join(bundle_dir, METADATA_FILE)):
+        ms, rss = _measure_load('bundle', bundle_dir, args.processes)
+        rows.append(("bundle (json/npy/ubj)", ms, rss, _dir_size_mb(bundle_dir, os.listdir(bundle_dir))))
+
+    print(f"\n  {'format':<24} {'load (ms)':>10} {'peak RSS +MB':>13} {'on disk MB':>11}")
+    for label, ms, rss, size in rows:
+        print(f"  {label:<24} {ms:>10.1f} {rss:>13.1f} {size:>11.2f}")
+
+
+def _load_test(call, clients, duration):
+    """Hammer `call` from concurrent client threads; return (requests/s, latencies ms)"""
+    latencies = []
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client():
+        local = []
+        while time.monotonic() < stop_at:
+            start = time.perf_counter()
+            call()
+            local.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(latencies) / duration, np.array(latencies)
+
+
+def bench_batching(args):
+    """Throughput and latency of concurrent predictions with and without micro-batching"""
+    bundle = load_current_bundle('model')
+
+    def direct():
+        return bundle.model.predict(preprocess_input(dict(SAMPLE_INPUT), bundle))[0]
+
+    def score(rows):
+        return list(bundle.model.predict(preprocess_batch(rows, bundle)))
+
+    direct()
+    print(f"  {args.clients} concurrent clients, {args.duration:.0f}s per setting\n")
+    print(f"  {'setting':<28} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+
+    def report(label, rps, latencies):
+        print(f"  {label:<28} {rps:>9.0f} {np.percentile(latencies, 50):>8.2f} "
+              f"{np.percentile(latencies, 99):>8.2f}")
+
+    report("unbatched", *_load_test(direct, args.clients, args.duration))
+    for max_batch in (8, 32, 128):
+        for max_wait_ms in (0.5, 2.0, 5.0):
+            batcher = MicroBatcher(score, max_batch=max_batch, max_wait_ms=max_wait_ms)
+            result = _load_test(lambda: batcher.submit(dict(SAMPLE_INPUT)), args.clients, args.duration)
+            report(f"batch<={max_batch}, wait {max_wait_ms} ms", *result)
+
+
+def bench_comparables(args):
+    """Comparable-listing query latency against index size"""
+    bundle = load_current_bundle('model')
+    index = bundle.comparables
+    if index is None:
+        print("  Current bundle has no comparables index, retrain with train.py")
+        return
+
+    # Raw rows of the saved index, resampled to smaller and larger indexes
+    n = len(index)
+    features = np.asarray(index.features)
+    cities = np.repeat(np.array(index.cities, dtype=str), np.diff(index.offsets))
+    localities = np.array(index.localities, dtype=str)[index.locality_codes]
+    types = np.array(index.property_types, dtype=str)[index.property_type_codes]
+    x = preprocess_input(dict(SAMPLE_INPUT), bundle, target_encoded=True)[0]
+    rng = np.random.default_rng(42)
+
+    print(f"  Bundle index: {n} listings, {len(index.cities)} cities, k={args.k}\n")
+    print(f"  {'rows':>10} {'city p50 ms':>12} {'city p95 ms':>12} {'all p50 ms':>11} {'all p95 ms':>11}")
+    for factor in (0.1, 0.25, 0.5, 1, 2, 4):
+        rows = rng.choice(n, int(n * factor), replace=factor > 1)
+        sized = ComparablesIndex.build(features[rows], index.prices[rows], cities[rows],
+                                       localities[rows], types[rows], index.feature_order)
+        city = time_calls(lambda: sized.query(x, city=SAMPLE_INPUT['City'], k=args.k), args.repeats)
+        scan = time_calls(lambda: sized.query(x, city=None, k=args.k), args.repeats)
+        print(f"  {len(sized):>10} {np.percentile(city, 50):>12.3f} {np.percentile(city, 95):>12.3f} "
+              f"{np.percentile(scan, 50):>11.3f} {np.percentile(scan, 95):>11.3f}")
+
+
+def bench_locations(args):
+    """Locality search latency for prefix, filtered and misspelled queries"""
+    bundle = load_current_bundle('model')
+    if bundle.locations is None:
+        print("  Current bundle has no location index, retrain with train.py")
+        return
+
+    start = time.perf_counter()
+    index = LocationSearchIndex(bundle.locations)
+    print(f"  {len(index)} localities indexed in {(time.perf_counter() - start) * 1000:.1f} ms\n")
+
+    # Queries built from real names: typed prefixes and a dropped letter
+    rng = np.random.default_rng(42)
+    picks = [index.entries[i] for i in rng.choice(len(index), min(200, len(index)), replace=False)]
+    prefixes = [locality[:3] for _, _, locality in picks]
+    typos = [locality[:2] + locality[3:] for _, _, locality in picks if len(locality) > 4]
+
+    def cycle(queries, **filters):
+        queries = itertools.cycle(queries)
+        return lambda: index.search(next(queries), **filters)
+
+    print_latency("prefix, all cities", time_calls(cycle(prefixes), args.repeats))
+    print_latency("prefix, one city", time_calls(cycle(prefixes, city=picks[0][1]), args.repeats))
+    print_latency("misspelled (fuzzy)", time_calls(cycle(typos), args.repeats))
+    print_latency("misspelled, fuzzy off", time_calls(cycle(typos, fuzzy=False), args.repeats))
+
+
+def bench_audit(args):
+    """Request-path cost of the prediction audit log and its write throughput"""
+    import sqlite3
+    import tempfile
+    fields = list(SAMPLE_INPUT)
+    with tempfile.TemporaryDirectory() as log_dir:
+        log = PredictionLog(os.path.join(log_dir, 'audit.db'), fields)
+        record = lambda: log.log('0' * 32, SAMPLE_INPUT, 50.0, 'bench', 1.0)
+        print_latency("log() on the request path", time_calls(record, args.repeats))
+
+        start = time.perf_counter()
+        for _ in range(args.records):
+            record()
+        queued = time.perf_counter() - start
+        log.close()
+        written = time.perf_counter() - start
+        with sqlite3.connect(os.path.join(log_dir, 'audit.db')) as connection:
+            rows = connection.execute('SELECT COUNT(*) FROM predictions').fetchone()[0]
+        print(f"  {args.records} records queued in {queued * 1000:.1f} ms, "
+              f"written in {written * 1000:.1f} ms ({rows} rows, {log.dropped} dropped)")
+
+        # A queue far smaller than the burst: records are dropped, callers never wait
+        small = PredictionLog(os.path.join(log_dir, 'small.db'), fields, max_queue=100)
+        burst = time_calls(lambda: small.log('0' * 32, SAMPLE_INPUT, 50.0, 'bench', 1.0), args.records)
+        small.close()
+        print_latency("log() with a full queue", burst)
+        print(f"  {small.dropped} of {args.records} records dropped with max_queue=100")
+
+
+def bench_drift(args):
+    """Per-request cost of drift counting and the cost of a /api/drift report"""
+    bundle = load_current_bundle('model')
+    if bundle.drift is None:
+        print("  Current bundle has no drift baseline, retrain with train.py")
+        return
+
+    monitor = DriftMonitor.from_bundle(bundle)
+    print_latency("observe() per request", time_calls(lambda: monitor.observe(SAMPLE_INPUT), args.repeats))
+    print_latency("report()", time_calls(monitor.report, args.repeats))
+
+    # Every request the same listing: once there are enough, the report should flag it
+    while monitor.observations < MIN_OBSERVATIONS:
+        monitor.observe(SAMPLE_INPUT)
+    drifted = monitor.report()['drifted']
+    print(f"  {monitor.observations} identical requests, drifted: {', '.join(drifted) or 'none'}")
+
+
+# Imports the server in a fresh interpreter, then times its first two requests
+_STARTUP_PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+client = app.app.test_client()
+timings = []
+for _ in range(2):
+    t = time.perf_counter()
+    client.post('/api/predict', json=json.loads(sys.argv[1]))
+    timings.append((time.perf_counter() - t) * 1000)
+print(json.dumps({'import_s': imported - start, 'first_ms': timings[0], 'second_ms': timings[1],
+                  'ready': client.get('/readyz').status_code == 200}))
+'''
+
+
+def _parse_importtime(stderr):
+    """(self_us, cumulative_us, depth, module) rows from -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return rows
+
+
+def bench_startup(args):
+    """Server import time, time to ready and first-request latency, with an import profile"""
+    payload = dict(SAMPLE_INPUT, Amenities='Gym, Pool', Parking_Space='yes', Security='yes')
+    runs = []
+    for i in range(args.processes):
+        command = [sys.executable]
+        if i == 0:
+            command += ['-X', 'importtime']
+        start = time.perf_counter()
+        result = subprocess.run(command + ['-c', _STARTUP_PROBE, json.dumps(payload)],
+                                cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+        wall = time.perf_counter() - start
+        if i == 0:
+            profile = _parse_importtime(result.stderr)
+            continue  # -X importtime slows the import down, keep it out of the timings
+        runs.append(dict(json.loads(result.stdout.strip().splitlines()[-1]), wall_s=wall))
+
+    # Full profile as an artifact, slowest cumulative imports first
+    with open(args.output, 'w') as f:
+        f.write(f"{'self [us]':>10} {'cumulative [us]':>16}  module\n")
+        for self_us, cumulative_us, depth, name in sorted(profile, key=lambda r: -r[1]):
+            f.write(f"{self_us:>10} {cumulative_us:>16}  {'  ' * depth}{name}\n")
+
+    print(f"  {'module':<32} {'cumulative ms':>14}")
+    top_level = sorted((r for r in profile if r[2] <= 1), key=lambda r: -r[1])
+    for _, cumulative_us, _, name in top_level[:args.top]:
+        print(f"  {name:<32} {cumulative_us / 1000:>14.1f}")
+
+    print(f"\n  Median over {len(runs)} fresh processes:")
+    for key, label in (('import_s', 'import + model load + warm-up (s)'),
+                       ('wall_s', 'process wall time (s)'),
+                       ('first_ms', 'first /api/predict (ms)'),
+                       ('second_ms', 'second /api/predict (ms)')):
+        print(f"  {label:<36} {np.median([r[key] for r in runs]):>8.3f}")
+    print(f"  {'ready after import':<36} {all(r['ready'] for r in runs)!s:>8}")
+    print(f"\n  Import profile written to {args.output}")
+
+
+# One serving worker: limit threads, load the bundle, then score single rows
+# from the moment the parent says go until the duration is up
+_WORKER_PROBE = '''
+import json, sys, time
+from threads import configure_threads
+threads = configure_threads()
+from preprocess import preprocess_input
+from registry import load_current_bundle
+bundle = load_current_bundle(sys.argv[1])
+bundle.set_threads(threads)
+payload, duration = json.loads(sys.argv[2]), float(sys.argv[3])
+bundle.model.predict(preprocess_input(dict(payload), bundle))
+print('ready', flush=True)
+sys.stdin.readline()
+latencies = []
+stop_at = time.perf_counter() + duration
+while time.perf_counter() < stop_at:
+    t = time.perf_counter()
+    bundle.model.predict(preprocess_input(dict(payload), bundle))
+    latencies.append((time.perf_counter() - t) * 1000)
+print(json.dumps(latencies))
+'''
+
+
+def _run_workers(workers, threads, duration):
+    """Start worker processes together; return (requests/s, latencies ms)"""
+    model_dir = os.path.abspath('model')
+    env = dict(os.environ, REALESTIMATE_INFERENCE_THREADS=str(threads))
+    for var in THREAD_ENV_VARS:
+        env.pop(var, None)
+    processes = [
+        subprocess.Popen([sys.executable, '-c', _WORKER_PROBE, model_dir,
+                          json.dumps(SAMPLE_INPUT), str(duration)],
+                         cwd=BACKEND_DIR, env=env, text=True,
+                         stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.stdout.readline()
+    for process in processes:
+        process.stdin.write('go\n')
+        process.stdin.flush()
+    latencies = []
+    for process in processes:
+        out, _ = process.communicate()
+        latencies.extend(json.loads(out.strip().splitlines()[-1]))
+    return len(latencies) / duration, np.array(latencies)
+
+
+def bench_threads(args):
+    """Throughput of concurrent worker processes for each workers x threads setting"""
+    cpus = available_cpus()
+    counts = sorted({1, 2, 4, cpus} | ({cpus // 2} if cpus > 2 else set()))
+    print(f"  {cpus} CPUs available, {args.duration:g}s per setting, single-row predictions\n")
+    print(f"  {'workers':>7} {'threads':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+
+    best = {}
+    for workers in counts:
+        for threads in counts:
+            if workers * threads > 2 * cpus:
+                continue  # far past oversubscription, only slow to run
+            rps, latencies = _run_workers(workers, threads, args.duration)
+            marker = '  <- default' if threads == inference_threads(workers, cpus) else ''
+            print(f"  {workers:>7} {threads:>7} {rps:>9.0f} {np.percentile(latencies, 50):>8.2f} "
+                  f"{np.percentile(latencies, 99):>8.2f}{marker}")
+            if rps > best.get(workers, (0, None))[0]:
+                best[workers] = (rps, threads)
+
+    print("\n  Best threads per worker count:")
+    for workers, (rps, threads) in best.items():
+        print(f"  {workers:>7} workers: {threads} threads ({rps:.0f} req/s)")
+
+
+def _fit_pipeline(kind, X_train, y_train, params):
+    """Fit one categorical pipeline; return (model, encoder, vocabularies, encode_s, fit_s)"""
+    from category_encoders import TargetEncoder
+    from xgboost import XGBRegressor
+    from pipeline import CATEGORICAL_COLS, category_vocabularies, to_native_categorical
+
+    start = time.perf_counter()
+    encoder = vocabularies = None
+    if kind == 'native':
+        vocabularies = category_vocabularies(X_train)
+        X_fit = to_native_categorical(X_train, vocabularies)
+    else:
+        encoder = TargetEncoder(cols=list(CATEGORICAL_COLS), smoothing=0.3)
+        X_fit = encoder.fit_transform(X_train, y_train)
+    encode_s = time.perf_counter() - start
+
+    model = XGBRegressor(**dict(params, enable_categorical=kind == 'native'))
+    start = time.perf_counter()
+    model.fit(X_fit, y_train)
+    return model, encoder, vocabularies, encode_s, time.perf_counter() - start
+
+
+def bench_categorical(args):
+    """TargetEncoder vs native categorical features: training time, serving latency, R²/MAE"""
+    import tempfile
+    import pandas as pd
+    from sklearn.metrics import r2_score, mean_absolute_error
+    from sklearn.model_selection import train_test_split
+    from pipeline import (FEATURE_ORDER, CATEGORICAL_COLS, NUMERICAL_COLS, TARGET_COL,
+                          normalize_listings, fill_missing, TargetStats, to_native_categorical)
+    from registry import save_bundle
+
+    df = normalize_listings(pd.read_csv(args.data))
+    if args.rows and args.rows < len(df):
+        df = df.sample(args.rows, random_state=42)
+    X = fill_missing(df[FEATURE_ORDER].copy())
+    y = df[TARGET_COL].fillna(df[TARGET_COL].median())
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    # Hyperparameters of the served model, with fewer trees to keep the run short
+    params = dict(load_current_bundle('model').model.get_params(), n_estimators=args.trees)
+    params.pop('feature_types', None)
+    stats = TargetStats(list(CATEGORICAL_COLS)).update(X_train, y_train)
+    print(f"  {len(X_train)} training rows, {len(X_test)} test rows, {args.trees} trees\n")
+
+    rows = []
+    with tempfile.TemporaryDirectory() as model_dir:
+        for kind in ('target', 'native'):
+            model, encoder, vocabularies, encode_s, fit_s = _fit_pipeline(kind, X_train, y_train, params)
+            X_eval = (to_native_categorical(X_test, vocabularies) if kind == 'native'
+                      else encoder.transform(X_test))
+            y_pred = model.predict(X_eval)
+
+            # Serve it the way the API does: saved bundle, one request at a time
+            save_bundle(model_dir, model, stats.to_tables(), {
+                'numerical_cols': list(NUMERICAL_COLS),
+                'categorical_cols': list(CATEGORICAL_COLS),
+                'feature_order': FEATURE_ORDER,
+                'categorical_encoding': kind,
+                'vocabularies': vocabularies
+            }, version=kind, publish=False)
+            bundle = ModelBundle(bundle_dir_for(model_dir, kind))
+            serve = lambda: bundle.model.predict(preprocess_input(dict(SAMPLE_INPUT), bundle))
+            serve()
+            latency = time_calls(serve, args.repeats)
+            rows.append((kind, encode_s, fit_s, np.percentile(latency, 50),
+                         r2_score(y_test, y_pred), mean_absolute_error(y_test, y_pred)))
+
+            if encoder is not None:
+                # Pre-bundle serving ran TargetEncoder.transform on every request
+                frame = pd.DataFrame([SAMPLE_INPUT])[FEATURE_ORDER]
+                transform = time_calls(lambda: encoder.transform(frame), min(args.repeats, 50))
+                print_latency("TargetEncoder.transform per row", transform)
+
+    print(f"\n  {'pipeline':<10} {'encode s':>9} {'fit s':>8} {'serve p50 ms':>13} {'R²':>8} {'MAE':>8}")
+    for kind, encode_s, fit_s, p50, r2, mae in rows:
+        print(f"  {kind:<10} {encode_s:>9.2f} {fit_s:>8.1f} {p50:>13.3f} {r2:>8.4f} {mae:>8.2f}")
+
+
+BENCHMARKS = {
+    'intervals': bench_intervals,
+    'serialization': bench_serialization,
+    'batching': bench_batching,
+    'comparables': bench_comparables,
+    'locations': bench_locations,
+    'audit': bench_audit,
+    'drift': bench_drift,
+    'startup': bench_startup,
+    'threads': bench_threads,
+    'categorical': bench_categorical,
+}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='RealEstiMate serving benchmarks')
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    parser.add_argument('--repeats', type=int, default=200, help='Timed calls per measurement')
+    parser.add_argument('--processes', type=int, default=5, help='Fresh processes per cold-load measurement')
+    parser.add_argument('--legacy-dir', default='model', help='Directory with the old per-file pickles')
+    parser.add_argument('--clients', type=int, default=32, help='Concurrent clients for load tests')
+    parser.add_argument('--duration', type=float, default=3.0, help='Seconds per load-test setting')
+    parser.add_argument('--output', default='importtime.txt', help='Import profile report for startup')
+    parser.add_argument('--top', type=int, default=15, help='Slowest imports to print for startup')
+    parser.add_argument('--data', default='data.csv', help='Listings CSV for categorical')
+    parser.add_argument('--rows', type=int, default=50000, help='Rows sampled for categorical (0 = all)')
+    parser.add_argument('--trees', type=int, default=300, help='Boosting rounds for categorical')
+    parser.add_argument('--records', type=int, default=20000, help='Records logged for audit')
+    parser.add_argument('--k', type=int, default=5, help='Neighbours per comparables query')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"Benchmark: {args.benchmark}")
+    print("=" * 60)
+    BENCHMARKS[args.benchmark](args)
+    print("=" * 60)
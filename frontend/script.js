@@ -135,6 +135,9 @@ function setupEventListeners() {
         }
     });
     
+    // Locality search-as-you-type fills State, City and Locality in one step
+    setupLocationSearch();
+    
     // Form submission handler
     form.addEventListener('submit', async function(e) {
         e.preventDefault();
@@ -221,6 +224,76 @@ async function loadLocalities(city) {
     }
 }
 
+// Suggestions shown for the current search text, keyed by their label
+let locationSuggestions = {};
+
+// Search-as-you-type over localities
+function setupLocationSearch() {
+    const searchInput = document.getElementById('LocationSearch');
+    const suggestionList = document.getElementById('locationSuggestions');
+    if (!searchInput || !suggestionList) {
+        return;
+    }
+    
+    let debounceTimer = null;
+    let latestQuery = '';
+    
+    searchInput.addEventListener('input', function() {
+        const query = this.value.trim();
+        
+        // Picking a suggestion from the list fires input with its label
+        if (locationSuggestions[query]) {
+            selectLocation(locationSuggestions[query]);
+            return;
+        }
+        
+        clearTimeout(debounceTimer);
+        if (query.length < 2) {
+            suggestionList.innerHTML = '';
+            locationSuggestions = {};
+            return;
+        }
+        
+        debounceTimer = setTimeout(async function() {
+            latestQuery = query;
+            try {
+                const response = await fetch(`${API_BASE_URL}/locations/search?q=${encodeURIComponent(query)}`);
+                const data = await response.json();
+                
+                // A slower response for older text must not replace newer suggestions
+                if (query !== latestQuery) {
+                    return;
+                }
+                
+                suggestionList.innerHTML = '';
+                locationSuggestions = {};
+                (data.results || []).forEach(([state, city, locality]) => {
+                    const label = `${locality}, ${city}, ${state}`;
+                    locationSuggestions[label] = { state, city, locality };
+                    const option = document.createElement('option');
+                    option.value = label;
+                    suggestionList.appendChild(option);
+                });
+            } catch (error) {
+                console.error('Error searching localities:', error);
+            }
+        }, 150);
+    });
+}
+
+// Fill the State, City and Locality dropdowns from a search suggestion
+async function selectLocation({ state, city, locality }) {
+    const stateSelect = document.getElementById('State');
+    const citySelect = document.getElementById('City');
+    const localitySelect = document.getElementById('Locality');
+    
+    stateSelect.value = state;
+    await loadCities(state);
+    citySelect.value = city;
+    await loadLocalities(city);
+    localitySelect.value = locality;
+}
+
 // Predict price
 async function predictPrice() {
     const form = document.getElementById('predictionForm');
@@ -312,6 +385,14 @@ async function predictPrice() {
     }
 }
 
+// Format a price in lakhs as "x.xx Lakhs" or "x.xx Crores"
+function formatLakhs(price) {
+    if (price >= 100) {
+        return `${(price / 100).toFixed(2)} Crores`;
+    }
+    return `${price.toLocaleString('en-IN', {minimumFractionDigits: 2, maximumFractionDigits: 2})} Lakhs`;
+}
+
 // Show success result
 function showSuccess(result) {
     const resultDiv = document.getElementById('result');
@@ -330,11 +411,20 @@ function showSuccess(result) {
         formattedPrice = price.toLocaleString('en-IN', {minimumFractionDigits: 2, maximumFractionDigits: 2});
     }
     
+    // Show the calibrated price range if the backend returned one
+    let rangeHtml = '';
+    if (result.prediction_interval) {
+        const interval = result.prediction_interval;
+        const coverage = Math.round(interval.coverage * 100);
+        rangeHtml = `<div class="prediction-result-unit">Likely range (${coverage}%): ₹${formatLakhs(interval.low)} - ₹${formatLakhs(interval.high)}</div>`;
+    }
+    
     resultDiv.innerHTML = `
         <div class="prediction-result-card">
             <div class="prediction-result-title">Estimated Price</div>
             <div class="prediction-result-value">₹${formattedPrice}</div>
             <div class="prediction-result-unit">${unit}</div>
+            ${rangeHtml}
         </div>
     `;
     
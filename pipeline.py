@@ -0,0 +1,198 @@
+"""
+Shared data preparation for train.py and update_model.py
+
+Both scripts must produce identical features, so the cleaning steps and the
+streaming target-encoding statistics live here.
+"""
+import numpy as np
+import pandas as pd
+from backend.encoding import EncodingTables
+
+# Define feature order (EXACT ORDER for training and prediction)
+FEATURE_ORDER = [
+    'State', 'City', 'Locality', 'Property_Type', 'BHK', 'Size_in_SqFt',
+    'Furnished_Status', 'Floor_No', 'Total_Floors', 'Age_of_Property',
+    'Nearby_Schools', 'Nearby_Hospitals', 'Public_Transport_Accessibility',
+    'Parking_Space', 'Security', 'Amenities', 'Facing', 'Owner_Type',
+    'Availability_Status'
+]
+
+CATEGORICAL_COLS = ['State', 'City', 'Locality', 'Property_Type', 'Furnished_Status',
+                    'Public_Transport_Accessibility', 'Parking_Space', 'Security',
+                    'Facing', 'Owner_Type', 'Availability_Status']
+NUMERICAL_COLS = ['BHK', 'Size_in_SqFt', 'Floor_No', 'Total_Floors', 'Age_of_Property',
+                  'Nearby_Schools', 'Nearby_Hospitals', 'Amenities']
+
+TARGET_COL = 'Price_in_Lakhs'
+
+
+def count_amenities(amenities_str):
+    """Count number of amenities from comma-separated string"""
+    if pd.isna(amenities_str) or amenities_str == '' or amenities_str == 'nan':
+        return 0
+    if isinstance(amenities_str, str):
+        return len([a.strip() for a in amenities_str.split(',') if a.strip()])
+    return 0
+
+
+def normalize_listings(df):
+    """
+    Normalize text formatting and count amenities (in place)
+
+    Args:
+        df: Raw listings as read from data.csv
+
+    Returns:
+        The same DataFrame, cleaned
+    """
+    # Normalize Availability_Status
+    df['Availability_Status'] = df['Availability_Status'].str.strip()
+    df['Availability_Status'] = df['Availability_Status'].replace({
+        'Ready To Move': 'Ready_To_Move',
+        'Ready to Move': 'Ready_To_Move',
+        'ready to move': 'Ready_To_Move'
+    })
+
+    # Normalize Furnished_Status
+    df['Furnished_Status'] = df['Furnished_Status'].str.strip()
+    df['Furnished_Status'] = df['Furnished_Status'].replace({
+        'Semi-Furnished': 'Semi_Furnished',
+        'Semi-furnished': 'Semi_Furnished',
+        'semi-furnished': 'Semi_Furnished',
+        'semi furnished': 'Semi_Furnished'
+    })
+
+    # Normalize yes/no values to Yes/No
+    for col in ['Parking_Space', 'Security']:
+        if col in df.columns:
+            df[col] = df[col].astype(str).str.strip().str.lower()
+            df[col] = df[col].replace({'yes': 'Yes', 'no': 'No', 'y': 'Yes', 'n': 'No'})
+
+    # Trim whitespaces from all string columns
+    string_cols = df.select_dtypes(include=['object']).columns
+    for col in string_cols:
+        df[col] = df[col].astype(str).str.strip()
+
+    df['Amenities'] = df['Amenities'].apply(count_amenities)
+    return df
+
+
+def fill_missing(X):
+    """Fill missing values: mode for categorical columns, median for numerical ones"""
+    for col in X.columns:
+        if col in CATEGORICAL_COLS:
+            mode_val = X[col].mode()
+            if len(mode_val) > 0:
+                X[col] = X[col].fillna(mode_val[0])
+            else:
+                X[col] = X[col].fillna('Unknown')
+        else:
+            X[col] = X[col].fillna(X[col].median() if X[col].dtype in ['int64', 'float64'] else 0)
+    return X
+
+
+def category_vocabularies(X, cols=CATEGORICAL_COLS):
+    """Sorted categories of each column, frozen into native-categorical bundles"""
+    return {col: sorted(X[col].astype(str).unique().tolist()) for col in cols}
+
+
+def to_native_categorical(X, vocabularies):
+    """
+    Categorical columns as pandas category dtype over frozen vocabularies
+
+    Category codes are positions in the sorted vocabulary, which is what the
+    server looks up per request. Values outside the vocabulary become NaN
+    (treated as missing by XGBoost).
+    """
+    X = X.copy()
+    for col, categories in vocabularies.items():
+        X[col] = pd.Categorical(X[col].astype(str), categories=categories)
+    return X
+
+
+class TargetStats:
+    """
+    Streaming sufficient statistics for target encoding
+
+    Keeps per-category counts and target sums so the encoding can be
+    recomputed after new rows arrive without re-reading old data. Uses the
+    same smoothing formula as category_encoders.TargetEncoder.
+    """
+
+    def __init__(self, cols, smoothing=0.3, min_samples_leaf=20):
+        self.cols = list(cols)
+        self.smoothing = smoothing
+        self.min_samples_leaf = min_samples_leaf
+        self.n = 0
+        self.total = 0.0
+        self.counts = {col: {} for col in self.cols}
+        self.sums = {col: {} for col in self.cols}
+
+    def update(self, X, y):
+        """Add rows to the statistics"""
+        y = pd.Series(np.asarray(y, dtype=float), index=X.index)
+        self.n += len(y)
+        self.total += float(y.sum())
+        for col in self.cols:
+            grouped = y.groupby(X[col]).agg(['count', 'sum'])
+            counts, sums = self.counts[col], self.sums[col]
+            for category, count, total in zip(grouped.index, grouped['count'], grouped['sum']):
+                counts[category] = counts.get(category, 0) + int(count)
+                sums[category] = sums.get(category, 0.0) + float(total)
+        return self
+
+    @property
+    def prior(self):
+        return self.total / self.n if self.n else 0.0
+
+    def encoding(self, col):
+        """Smoothed encoding for every category of a column"""
+        prior = self.prior
+        encoded = {}
+        for category, count in self.counts[col].items():
+            weight = 1 / (1 + np.exp(-(count - self.min_samples_leaf) / self.smoothing))
+            encoded[category] = prior * (1 - weight) + (self.sums[col][category] / count) * weight
+        return encoded
+
+    def transform(self, X):
+        """Target-encode the categorical columns of X (unknown categories get the prior)"""
+        X = X.copy()
+        prior = self.prior
+        for col in self.cols:
+            X[col] = X[col].map(self.encoding(col)).astype(float).fillna(prior)
+        return X
+
+    def to_tables(self):
+        """Flat array tables for the model bundle (see backend/encoding.py)"""
+        categories, values, counts, sums, offsets = [], [], [], [], [0]
+        for col in self.cols:
+            encoded = self.encoding(col)
+            for category in sorted(encoded, key=str):
+                categories.append(str(category))
+                values.append(encoded[category])
+                counts.append(self.counts[col][category])
+                sums.append(self.sums[col][category])
+            offsets.append(len(categories))
+        return EncodingTables(
+            self.cols, offsets, np.array(categories, dtype=str), np.array(values, dtype=float),
+            self.prior, counts=np.array(counts, dtype=np.int64), sums=np.array(sums, dtype=float),
+            smoothing=self.smoothing, min_samples_leaf=self.min_samples_leaf
+        )
+
+    @classmethod
+    def from_tables(cls, tables):
+        """Rebuild the statistics from a bundle's encoding tables"""
+        if tables.counts is None or tables.sums is None:
+            raise ValueError("Encoding tables carry no counts/sums, re-run train.py to create them")
+        stats = cls(tables.columns, smoothing=tables.smoothing, min_samples_leaf=tables.min_samples_leaf)
+        for i, col in enumerate(tables.columns):
+            start, end = tables.offsets[i], tables.offsets[i + 1]
+            for j in range(start, end):
+                category = str(tables.categories[j])
+                stats.counts[col][category] = int(tables.counts[j])
+                stats.sums[col][category] = float(tables.sums[j])
+        # Every row contributes once to each column, so any column recovers n and the total
+        first = tables.columns[0]
+        stats.n = sum(stats.counts[first].values())
+        stats.total = sum(stats.sums[first].values())
+        return stats
@@ -1,11 +1,14 @@
 import pandas as pd
 import numpy as np
-import joblib
 from sklearn.metrics import r2_score, mean_absolute_error
 from backend.preprocess import preprocess_input
+from backend.registry import load_current_bundle
+from backend.schema import error_summary
 
 # Load model
-model = joblib.load('model/model.pkl')
+bundle = load_current_bundle('model')
+model = bundle.model
+print(f"Model version: {bundle.version}")
 print(f"Model type: {type(model)}")
 
 # Load test data
@@ -86,34 +89,13 @@ print("="*60)
 predictions = []
 for i, sample in enumerate(test_samples, 1):
     try:
-        # Normalize the sample data
-        sample_copy = sample.copy()
+        # Same validation and normalization as /api/predict
+        sample_copy, errors = bundle.schema.validate(sample)
+        if errors:
+            print(f"\nSample {i} rejected: {error_summary(errors)}")
+            continue
         
-        # Normalize Availability_Status
-        if sample_copy['Availability_Status'] in ['Ready To Move', 'Ready to Move', 'ready to move']:
-            sample_copy['Availability_Status'] = 'Ready_To_Move'
-        
-        # Normalize Furnished_Status
-        if sample_copy['Furnished_Status'] in ['Semi-Furnished', 'Semi-furnished', 'semi-furnished', 'semi furnished']:
-            sample_copy['Furnished_Status'] = 'Semi_Furnished'
-        
-        # Normalize yes/no values to Yes/No
-        for col in ['Parking_Space', 'Security']:
-            if col in sample_copy:
-                val = str(sample_copy[col]).strip().lower()
-                sample_copy[col] = 'Yes' if val in ['yes', 'y'] else 'No'
-        
-        # Convert Amenities string to count
-        if 'Amenities' in sample_copy and isinstance(sample_copy['Amenities'], str):
-            amenities_str = sample_copy['Amenities']
-            if pd.isna(amenities_str) or amenities_str == '' or amenities_str == 'nan':
-                sample_copy['Amenities'] = 0
-            else:
-                sample_copy['Amenities'] = len([a.strip() for a in amenities_str.split(',') if a.strip()])
-        elif 'Amenities' not in sample_copy:
-            sample_copy['Amenities'] = 0
-        
-        X = preprocess_input(sample_copy)
+        X = preprocess_input(sample_copy, bundle)
         pred = model.predict(X)[0]
         predictions.append(pred)
         print(f"\nSample {i}:")
@@ -148,66 +130,25 @@ print("\n" + "="*60)
 print("Testing Model Accuracy on Test Data")
 print("="*60)
 
-# Load preprocessing objects
-target_encoder = joblib.load('model/target_encoder.pkl')
-numerical_cols = joblib.load('model/numerical_cols.pkl')
-categorical_cols = joblib.load('model/categorical_cols.pkl')
-
 # Take a sample from actual data
 sample_df = df.sample(min(100, len(df)), random_state=42)
 print(f"Testing on {len(sample_df)} samples from dataset...")
 
 actual_prices = []
 predicted_prices = []
+rejected = 0
 
 for idx, row in sample_df.iterrows():
     try:
-        # Normalize the data to match training format
-        availability = str(row['Availability_Status']).strip()
-        if availability in ['Ready To Move', 'Ready to Move', 'ready to move']:
-            availability = 'Ready_To_Move'
-        
-        furnished = str(row['Furnished_Status']).strip()
-        if furnished in ['Semi-Furnished', 'Semi-furnished', 'semi-furnished', 'semi furnished']:
-            furnished = 'Semi_Furnished'
+        # Raw row through the same validation and normalization as /api/predict
+        data_dict, errors = bundle.schema.validate(
+            {col: row[col] for col in bundle.feature_order}
+        )
+        if errors:
+            rejected += 1
+            continue
         
-        # Normalize yes/no values
-        parking = str(row['Parking_Space']).strip().lower()
-        parking = 'Yes' if parking in ['yes', 'y'] else 'No'
-        
-        security = str(row['Security']).strip().lower()
-        security = 'Yes' if security in ['yes', 'y'] else 'No'
-        
-        # Convert Amenities to count
-        amenities = row['Amenities']
-        if isinstance(amenities, str) and amenities.strip():
-            amenities_count = len([a.strip() for a in amenities.split(',') if a.strip()])
-        else:
-            amenities_count = 0
-        
-        data_dict = {
-            'State': row['State'],
-            'City': row['City'],
-            'Locality': row['Locality'],
-            'Property_Type': row['Property_Type'],
-            'BHK': row['BHK'],
-            'Size_in_SqFt': row['Size_in_SqFt'],
-            'Furnished_Status': furnished,
-            'Floor_No': row['Floor_No'],
-            'Total_Floors': row['Total_Floors'],
-            'Age_of_Property': row['Age_of_Property'],
-            'Nearby_Schools': row['Nearby_Schools'],
-            'Nearby_Hospitals': row['Nearby_Hospitals'],
-            'Public_Transport_Accessibility': row['Public_Transport_Accessibility'],
-            'Parking_Space': parking,
-            'Security': security,
-            'Amenities': amenities_count,
-            'Facing': row['Facing'],
-            'Owner_Type': row['Owner_Type'],
-            'Availability_Status': availability
-        }
-        
-        X = preprocess_input(data_dict)
+        X = preprocess_input(data_dict, bundle)
         pred = model.predict(X)[0]
         
         actual_prices.append(row['Price_in_Lakhs'])
@@ -215,6 +156,9 @@ for idx, row in sample_df.iterrows():
     except Exception as e:
         continue
 
+if rejected:
+    print(f"  {rejected} rows failed request validation and were skipped")
+
 if actual_prices and predicted_prices:
     r2 = r2_score(actual_prices, predicted_prices)
     mae = mean_absolute_error(actual_prices, predicted_prices)
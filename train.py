@@ -4,8 +4,28 @@ from sklearn.model_selection import train_test_split
 from xgboost import XGBRegressor
 from category_encoders import TargetEncoder
 from sklearn.metrics import r2_score, mean_absolute_error
-import joblib
+import argparse
 import os
+import time
+from pipeline import (FEATURE_ORDER, CATEGORICAL_COLS, NUMERICAL_COLS, TARGET_COL,
+                      normalize_listings, fill_missing, TargetStats,
+                      category_vocabularies, to_native_categorical)
+from backend.intervals import build_interval_table, lookup_interval, DEFAULT_COVERAGE
+from backend.locations import build_location_index
+from backend.registry import save_bundle
+from backend.comparables import ComparablesIndex
+from backend.audit import read_logged_listings
+from backend.drift import build_baseline
+
+parser = argparse.ArgumentParser(description='Train the house price model')
+parser.add_argument('--categorical', choices=['target', 'native'], default='target',
+                    help='target: TargetEncoder features; native: XGBoost categorical splits '
+                         'on pandas category columns (no encoder at serve time)')
+parser.add_argument('--audit-log', default=None,
+                    help='Prediction audit log (REALESTIMATE_AUDIT_LOG); requests with a '
+                         'recorded Price_in_Lakhs are added as training rows')
+args = parser.parse_args()
+native_categorical = args.categorical == 'native'
 
 print("="*60)
 print("Indian House Price Prediction - Model Training")
@@ -18,58 +38,15 @@ print(f"Dataset loaded: {len(df)} rows, {len(df.columns)} columns")
 print(f"Columns: {df.columns.tolist()}")
 
 # Data Cleaning and Normalization
-print("\n2. Normalizing text formatting...")
-
-# Normalize Availability_Status
-df['Availability_Status'] = df['Availability_Status'].str.strip()
-df['Availability_Status'] = df['Availability_Status'].replace({
-    'Ready To Move': 'Ready_To_Move',
-    'Ready to Move': 'Ready_To_Move',
-    'ready to move': 'Ready_To_Move'
-})
-
-# Normalize Furnished_Status
-df['Furnished_Status'] = df['Furnished_Status'].str.strip()
-df['Furnished_Status'] = df['Furnished_Status'].replace({
-    'Semi-Furnished': 'Semi_Furnished',
-    'Semi-furnished': 'Semi_Furnished',
-    'semi-furnished': 'Semi_Furnished',
-    'semi furnished': 'Semi_Furnished'
-})
-
-# Normalize yes/no values to Yes/No
-for col in ['Parking_Space', 'Security']:
-    if col in df.columns:
-        df[col] = df[col].astype(str).str.strip().str.lower()
-        df[col] = df[col].replace({'yes': 'Yes', 'no': 'No', 'y': 'Yes', 'n': 'No'})
-
-# Trim whitespaces from all string columns
-string_cols = df.select_dtypes(include=['object']).columns
-for col in string_cols:
-    df[col] = df[col].astype(str).str.strip()
-
+print("\n2. Normalizing text formatting and processing Amenities feature...")
+df = normalize_listings(df)
 print("Text normalization completed")
 
-# Feature Engineering: Count amenities
-print("\n3. Processing Amenities feature...")
-def count_amenities(amenities_str):
-    """Count number of amenities from comma-separated string"""
-    if pd.isna(amenities_str) or amenities_str == '' or amenities_str == 'nan':
-        return 0
-    if isinstance(amenities_str, str):
-        return len([a.strip() for a in amenities_str.split(',') if a.strip()])
-    return 0
-
-df['Amenities'] = df['Amenities'].apply(count_amenities)
-
-# Define feature order (EXACT ORDER for training and prediction)
-FEATURE_ORDER = [
-    'State', 'City', 'Locality', 'Property_Type', 'BHK', 'Size_in_SqFt',
-    'Furnished_Status', 'Floor_No', 'Total_Floors', 'Age_of_Property',
-    'Nearby_Schools', 'Nearby_Hospitals', 'Public_Transport_Accessibility',
-    'Parking_Space', 'Security', 'Amenities', 'Facing', 'Owner_Type',
-    'Availability_Status'
-]
+# Logged requests were normalized by the server already, so they join after data.csv is
+if args.audit_log:
+    logged = read_logged_listings(args.audit_log, FEATURE_ORDER)
+    df = pd.concat([df, logged], ignore_index=True)
+    print(f"Added {len(logged)} logged predictions with a known price from {args.audit_log}")
 
 # Verify all features exist
 missing_features = [f for f in FEATURE_ORDER if f not in df.columns]
@@ -80,29 +57,18 @@ print(f"Using {len(FEATURE_ORDER)} features in exact order")
 
 # Prepare data
 X = df[FEATURE_ORDER].copy()
-y = df['Price_in_Lakhs'].copy()
+y = df[TARGET_COL].copy()
 
 # Identify categorical and numerical columns
-categorical_cols = ['State', 'City', 'Locality', 'Property_Type', 'Furnished_Status',
-                   'Public_Transport_Accessibility', 'Parking_Space', 'Security',
-                   'Facing', 'Owner_Type', 'Availability_Status']
-numerical_cols = ['BHK', 'Size_in_SqFt', 'Floor_No', 'Total_Floors', 'Age_of_Property',
-                 'Nearby_Schools', 'Nearby_Hospitals', 'Amenities']
+categorical_cols = list(CATEGORICAL_COLS)
+numerical_cols = list(NUMERICAL_COLS)
 
 print(f"Categorical features: {len(categorical_cols)}")
 print(f"Numerical features: {len(numerical_cols)}")
 
 # Handle missing values
 print("\n4. Handling missing values...")
-for col in X.columns:
-    if col in categorical_cols:
-        mode_val = X[col].mode()
-        if len(mode_val) > 0:
-            X[col] = X[col].fillna(mode_val[0])
-        else:
-            X[col] = X[col].fillna('Unknown')
-    else:
-        X[col] = X[col].fillna(X[col].median() if X[col].dtype in ['int64', 'float64'] else 0)
+X = fill_missing(X)
 
 y = y.fillna(y.median())
 
@@ -111,27 +77,37 @@ if X.isna().sum().sum() > 0:
     print(f"Warning: {X.isna().sum().sum()} NaN values remaining, filling with 0")
     X = X.fillna(0)
 
-# Encode categorical variables using TargetEncoder
-print("\n5. Encoding categorical variables with TargetEncoder...")
-
-# Define categorical columns for TargetEncoder
-cat_cols = [
-    'State', 'City', 'Locality', 'Property_Type', 'Furnished_Status',
-    'Public_Transport_Accessibility', 'Parking_Space', 'Security',
-    'Facing', 'Owner_Type', 'Availability_Status'
-]
-
-# Initialize and fit TargetEncoder
-encoder = TargetEncoder(cols=cat_cols, smoothing=0.3)
-X_encoded = encoder.fit_transform(X, y)
-
-# TargetEncoder already handles all columns, so X_encoded is our final dataset
-X_final = X_encoded.copy()
-
-# Check for any infinite or NaN values
-if np.isinf(X_final.values).any() or np.isnan(X_final.values).any():
+# Per-category counts and sums: the bundle's encoding tables are built from
+# these, and update_model.py refreshes them without re-reading old data
+cat_cols = list(CATEGORICAL_COLS)
+target_stats = TargetStats(cat_cols, smoothing=0.3, min_samples_leaf=20).update(X, y)
+
+vocabularies = None
+encode_start = time.perf_counter()
+if native_categorical:
+    # Category dtype columns go straight into XGBoost, vocabularies are frozen in the bundle
+    print("\n5. Converting categorical variables to pandas categories...")
+    vocabularies = category_vocabularies(X, cat_cols)
+    X_final = to_native_categorical(X, vocabularies)
+    print(f"Vocabulary sizes: {', '.join(f'{col}={len(v)}' for col, v in vocabularies.items())}")
+else:
+    # Encode categorical variables using TargetEncoder
+    print("\n5. Encoding categorical variables with TargetEncoder...")
+
+    # Initialize and fit TargetEncoder
+    encoder = TargetEncoder(cols=cat_cols, smoothing=target_stats.smoothing,
+                            min_samples_leaf=target_stats.min_samples_leaf)
+    X_encoded = encoder.fit_transform(X, y)
+
+    # TargetEncoder already handles all columns, so X_encoded is our final dataset
+    X_final = X_encoded.copy()
+print(f"Categorical preparation took {time.perf_counter() - encode_start:.2f}s")
+
+# Check for any infinite or NaN values (category columns hold labels, not numbers)
+check_cols = numerical_cols if native_categorical else FEATURE_ORDER
+if np.isinf(X_final[check_cols].values).any() or np.isnan(X_final[check_cols].values).any():
     print("Warning: Found infinite or NaN values, replacing with 0")
-    X_final = X_final.replace([np.inf, -np.inf], 0).fillna(0)
+    X_final[check_cols] = X_final[check_cols].replace([np.inf, -np.inf], 0).fillna(0)
 
 print(f"Final feature matrix shape: {X_final.shape}")
 print(f"Target variable stats - Mean: {y.mean():.2f}, Std: {y.std():.2f}, Min: {y.min():.2f}, Max: {y.max():.2f}")
@@ -158,11 +134,14 @@ model = XGBRegressor(
     objective='reg:squarederror',
     tree_method="hist",
     max_bin=256,
+    enable_categorical=native_categorical,
     random_state=42
 )
 
 
+fit_start = time.perf_counter()
 model.fit(X_train, y_train)
+print(f"Training took {time.perf_counter() - fit_start:.1f}s")
 
 # Evaluate model
 print("\n8. Evaluating model...")
@@ -180,6 +159,45 @@ print(f"  Test R²: {test_r2:.4f}")
 print(f"  Train MAE: {train_mae:.2f} Lakhs")
 print(f"  Test MAE: {test_mae:.2f} Lakhs")
 
+# Calibrate prediction intervals (split conformal on held-out rows)
+print("\n8.1 Calibrating prediction intervals...")
+# Half of the test set calibrates the table, the other half checks coverage
+calib_idx, check_idx = train_test_split(X_test.index, test_size=0.5, random_state=42)
+calib_residuals = y_test.loc[calib_idx] - model.predict(X_test.loc[calib_idx])
+interval_table = build_interval_table(
+    calib_residuals.values,
+    X.loc[calib_idx, 'City'].values,
+    X.loc[calib_idx, 'Property_Type'].values,
+    coverage=DEFAULT_COVERAGE
+)
+
+check_pred = model.predict(X_test.loc[check_idx])
+check_intervals = [
+    lookup_interval(interval_table, city, ptype, pred)
+    for city, ptype, pred in zip(X.loc[check_idx, 'City'], X.loc[check_idx, 'Property_Type'], check_pred)
+]
+covered = np.array([
+    iv['low'] <= actual <= iv['high']
+    for iv, actual in zip(check_intervals, y_test.loc[check_idx].values)
+])
+print(f"  Target coverage: {DEFAULT_COVERAGE:.0%}, empirical coverage: {covered.mean():.1%}")
+print(f"  Global half-width: {interval_table['global']:.2f} Lakhs")
+print(f"  Groups calibrated: {sum(len(g) for g in interval_table['groups'].values())}")
+
+# Index every listing in the encoded feature space for /api/comparables
+print("\n8.2 Building comparables index...")
+# Distances are taken in the target-encoded space for both categorical modes
+X_index = target_stats.transform(X) if native_categorical else X_final
+comparables = ComparablesIndex.build(
+    X_index[FEATURE_ORDER].values,
+    y.values,
+    X['City'].values,
+    X['Locality'].values,
+    X['Property_Type'].values,
+    FEATURE_ORDER
+)
+print(f"  Indexed {len(comparables)} listings across {len(comparables.cities)} cities")
+
 
 # -------------------------
 # 10. SHAP Analysis
@@ -201,21 +219,33 @@ print("SHAP analysis completed.")
 
 
 # Save model and preprocessing objects
-print("\n9. Saving model and preprocessing objects...")
+print("\n9. Saving model bundle...")
 os.makedirs('model', exist_ok=True)
 
-joblib.dump(model, 'model/model.pkl')
-joblib.dump(encoder, 'model/target_encoder.pkl')
-joblib.dump(numerical_cols, 'model/numerical_cols.pkl')
-joblib.dump(cat_cols, 'model/categorical_cols.pkl')
-
-# Save feature order for reference
-joblib.dump(FEATURE_ORDER, 'model/feature_order.pkl')
+# Everything one model version needs is written together and checksummed,
+# then model/CURRENT is switched to it in one atomic rename
+version = save_bundle(
+    'model',
+    model,
+    target_stats.to_tables(),
+    {
+        'numerical_cols': numerical_cols,
+        'categorical_cols': cat_cols,
+        'feature_order': FEATURE_ORDER,
+        'interval_table': interval_table,
+        'categorical_encoding': args.categorical,
+        'vocabularies': vocabularies,
+        # /api/drift compares live requests with these training distributions
+        'drift_baseline': build_baseline(X, numerical_cols, cat_cols)
+    },
+    locations=build_location_index(df),
+    comparables=comparables
+)
 
 print("\n" + "="*60)
 print("Model Training Complete!")
 print("="*60)
-print(f"Model saved to: model/model.pkl")
+print(f"Model version {version} saved to: model/versions/{version}/")
 print(f"Test R²: {test_r2:.4f}")
 print(f"Test MAE: {test_mae:.2f} Lakhs")
 print("="*60)
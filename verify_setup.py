@@ -3,6 +3,8 @@ Verification script to check if all components are properly configured
 """
 import os
 import sys
+from backend.registry import (REQUIRED_FILES, LEGACY_FILES, MANIFEST_FILE, current_version,
+                              bundle_dir_for, verify_manifest, load_current_bundle)
 
 print("="*60)
 print("Indian House Price Prediction - Setup Verification")
@@ -23,17 +25,16 @@ else:
 # Check 2: Model directory and files
 print("2. Checking model files...")
 model_dir = 'model'
-required_model_files = [
-    'model.pkl',
-    'target_encoder.pkl',
-    'numerical_cols.pkl',
-    'categorical_cols.pkl',
-    'feature_order.pkl'
-]
 
 if os.path.exists(model_dir):
-    for file in required_model_files:
-        file_path = os.path.join(model_dir, file)
+    version = current_version(model_dir)
+    bundle_dir = bundle_dir_for(model_dir, version)
+    if version is None:
+        warnings.append("⚠ No model/CURRENT found, using legacy flat model directory")
+    else:
+        success.append(f"✓ Current model version: {version}")
+    for file in (REQUIRED_FILES if version is not None else LEGACY_FILES):
+        file_path = os.path.join(bundle_dir, file)
         if os.path.exists(file_path):
             size_mb = os.path.getsize(file_path) / (1024 * 1024)
             if size_mb > 1:
@@ -43,12 +44,18 @@ if os.path.exists(model_dir):
                 success.append(f"✓ {file} ({size_kb:.2f} KB)")
         else:
             errors.append(f"✗ Missing: {file}")
+    if version is not None:
+        try:
+            verify_manifest(bundle_dir)
+            success.append(f"✓ {MANIFEST_FILE} checksums match")
+        except Exception as e:
+            errors.append(f"✗ Bundle verification failed: {str(e)}")
 else:
     errors.append("✗ Model directory not found")
 
 # Check 3: Backend files
 print("3. Checking backend files...")
-backend_files = ['backend/app.py', 'backend/preprocess.py']
+backend_files = ['backend/app.py', 'backend/preprocess.py', 'backend/registry.py']
 for file in backend_files:
     if os.path.exists(file):
         success.append(f"✓ {file}")
@@ -71,9 +78,10 @@ else:
 
 # Check 6: Try loading the model
 print("6. Testing model loading...")
+bundle = None
 try:
-    import joblib
-    model = joblib.load('model/model.pkl')
+    bundle = load_current_bundle(model_dir)
+    model = bundle.model
     success.append(f"✓ Model loaded successfully (type: {type(model).__name__})")
 except Exception as e:
     errors.append(f"✗ Failed to load model: {str(e)}")
@@ -81,8 +89,7 @@ except Exception as e:
 # Check 7: Verify feature order
 print("7. Checking feature configuration...")
 try:
-    import joblib
-    feature_order = joblib.load('model/feature_order.pkl')
+    feature_order = bundle.feature_order
     expected_features = [
         'State', 'City', 'Locality', 'Property_Type', 'BHK', 'Size_in_SqFt',
         'Furnished_Status', 'Floor_No', 'Total_Floors', 'Age_of_Property',
@@ -101,6 +108,7 @@ except Exception as e:
 print("8. Testing preprocessing function...")
 try:
     from backend.preprocess import preprocess_input
+    from backend.schema import error_summary
     test_data = {
         'State': 'Madhya Pradesh',
         'City': 'Bhopal',
@@ -122,7 +130,11 @@ try:
         'Owner_Type': 'Owner',
         'Availability_Status': 'Ready To Move'
     }
-    X = preprocess_input(test_data)
+    # Validated and normalized the way /api/predict does it
+    input_data, validation_errors = bundle.schema.validate(test_data)
+    if validation_errors:
+        raise ValueError(error_summary(validation_errors))
+    X = preprocess_input(input_data, bundle)
     success.append(f"✓ Preprocessing works (output shape: {X.shape})")
 except Exception as e:
     errors.append(f"✗ Preprocessing failed: {str(e)}")
@@ -131,8 +143,8 @@ except Exception as e:
 print("9. Testing prediction...")
 try:
     from backend.preprocess import preprocess_input
-    import joblib
-    model = joblib.load('model/model.pkl')
+    from backend.schema import error_summary
+    model = bundle.model
     test_data = {
         'State': 'Madhya Pradesh',
         'City': 'Bhopal',
@@ -154,7 +166,11 @@ try:
         'Owner_Type': 'Owner',
         'Availability_Status': 'Ready To Move'
     }
-    X = preprocess_input(test_data)
+    # Validated and normalized the way /api/predict does it
+    input_data, validation_errors = bundle.schema.validate(test_data)
+    if validation_errors:
+        raise ValueError(error_summary(validation_errors))
+    X = preprocess_input(input_data, bundle)
     prediction = model.predict(X)[0]
     success.append(f"✓ Prediction works (predicted: ₹{prediction:.2f} Lakhs)")
 except Exception as e: